@@ -0,0 +1,133 @@
+# app/backtesting/_kernel.py
+from __future__ import annotations
+
+import numpy as np
+
+from app._jit import njit
+
+HOLD = 0
+BUY = 1
+SELL = 2
+
+# Explicit signatures compile eagerly at import (and are then served from the on-disk cache),
+# so the first backtest in a process does not pay the JIT cost.
+_POSITION_SIZE_SIG = "UniTuple(f8, 2)(f8, f8, f8, f8, f8)"
+_SIMULATE_SIG = "Tuple((f8, i8[:], i8[:], f8[:], f8[:], f8[:], f8[:], f8[:], f8[:]))(f8[:], i1[:], f8, f8, f8, f8, f8)"
+
+
+@njit(_POSITION_SIZE_SIG, cache=True)
+def _position_size(close, capital, slip_up, risk_per_trade, stop_loss_pct):
+    buy_price = close * slip_up
+    risk_amount = capital * risk_per_trade
+    stop_dist = buy_price * stop_loss_pct
+    qty = risk_amount / stop_dist if stop_dist > 0 else 0.0
+    max_qty = (capital * 0.95) / buy_price if buy_price > 0 else 0.0
+    return buy_price, min(qty, max_qty)
+
+
+@njit(_SIMULATE_SIG, cache=True)
+def simulate(closes, sigs, initial_capital, commission_pct, slippage_pct, risk_per_trade, stop_loss_pct):
+    n = closes.shape[0]
+    entry_idx = np.empty(n, dtype=np.int64)
+    exit_idx = np.empty(n, dtype=np.int64)
+    entry_px = np.empty(n, dtype=np.float64)
+    exit_px = np.empty(n, dtype=np.float64)
+    qtys = np.empty(n, dtype=np.float64)
+    pnls = np.empty(n, dtype=np.float64)
+    comms = np.empty(n, dtype=np.float64)
+    equity = np.empty(n, dtype=np.float64)
+
+    slip_up = 1 + slippage_pct
+    slip_dn = 1 - slippage_pct
+    stop_mul = 1 - stop_loss_pct
+
+    buy_bars = np.flatnonzero(sigs == BUY)
+    sell_bars = np.flatnonzero(sigs == SELL)
+
+    capital = initial_capital
+    position_qty = 0.0
+    entry_price = 0.0
+    entry_i = 0
+    k = 0
+    i = 0
+
+    while i < n:
+        if position_qty == 0:
+            # Flat: jump straight to the next BUY bar
+            b = np.searchsorted(buy_bars, i)
+            if b == buy_bars.shape[0]:
+                equity[i:] = capital
+                break
+            j = buy_bars[b]
+            equity[i:j] = capital
+            buy_price, qty = _position_size(closes[j], capital, slip_up, risk_per_trade, stop_loss_pct)
+            if qty > 0:
+                capital -= buy_price * qty * commission_pct
+                position_qty = qty
+                entry_price = buy_price
+                entry_i = j
+                equity[j] = capital + position_qty * closes[j]
+            else:
+                equity[j] = capital
+            i = j + 1
+            continue
+
+        # Long: the exit is the first stop-loss breach or the next SELL bar, whichever comes first
+        s = np.searchsorted(sell_bars, i)
+        next_sell = sell_bars[s] if s < sell_bars.shape[0] else n
+        end = next_sell + 1 if next_sell < n else n
+        breached = closes[i:end] <= entry_price * stop_mul
+        stopped = breached.any()
+        j = i + np.argmax(breached) if stopped else next_sell
+        if j >= n:
+            equity[i:] = capital + position_qty * closes[i:]
+            break
+        equity[i:j] = capital + position_qty * closes[i:j]
+
+        exit_price = closes[j] * slip_dn
+        commission = exit_price * position_qty * commission_pct
+        pnl = (exit_price - entry_price) * position_qty - commission
+        entry_idx[k] = entry_i
+        exit_idx[k] = j
+        entry_px[k] = entry_price
+        exit_px[k] = exit_price
+        qtys[k] = position_qty
+        pnls[k] = pnl
+        comms[k] = commission
+        k += 1
+        capital += pnl
+        position_qty = 0.0
+        entry_price = 0.0
+
+        # A stop-out frees the bar for a same-bar re-entry on a BUY signal
+        if stopped and sigs[j] == BUY:
+            buy_price, qty = _position_size(closes[j], capital, slip_up, risk_per_trade, stop_loss_pct)
+            if qty > 0:
+                capital -= buy_price * qty * commission_pct
+                position_qty = qty
+                entry_price = buy_price
+                entry_i = j
+        equity[j] = capital + (position_qty * closes[j] if position_qty > 0 else 0.0)
+        i = j + 1
+
+    # Close remaining position at last bar
+    if position_qty > 0:
+        exit_price = closes[n - 1] * slip_dn
+        commission = exit_price * position_qty * commission_pct
+        pnl = (exit_price - entry_price) * position_qty - commission
+        entry_idx[k] = entry_i
+        exit_idx[k] = n - 1
+        entry_px[k] = entry_price
+        exit_px[k] = exit_price
+        qtys[k] = position_qty
+        pnls[k] = pnl
+        comms[k] = commission
+        k += 1
+        capital += pnl
+
+    return (
+        capital,
+        entry_idx[:k], exit_idx[:k],
+        entry_px[:k], exit_px[:k], qtys[:k], pnls[:k], comms[:k],
+        equity,
+    )
@@ -1,18 +1,41 @@
 # app/backtesting/engine.py
 from __future__ import annotations
 
+import csv
+import hashlib
 import io
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional, Tuple, Union
 
 import numpy as np
 import pandas as pd
 
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:  # pragma: no cover - fall back to the pandas C parser
+    pa = pa_csv = None
+
+from app.backtesting._kernel import BUY, HOLD, SELL, simulate
 from app.config import settings
-from app.strategies.base import BaseStrategy, Signal
+from app.strategies.base import BaseStrategy, SignalBatch
+
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
+
+_OHLCV = ["open", "high", "low", "close", "volume"]
 
+_SIGNAL_CACHE_SIZE = 64
+_signal_cache: OrderedDict[tuple, np.ndarray] = OrderedDict()
+_signal_cache_lock = threading.Lock()
 
-@dataclass
+
+@dataclass(slots=True)
 class BacktestTrade:
     symbol: str
     side: str
@@ -26,7 +49,52 @@ class BacktestTrade:
     return_pct: float
 
 
-@dataclass
+def _empty_f8() -> np.ndarray:
+    return np.empty(0, dtype=np.float64)
+
+
+def _round(values: np.ndarray, ndigits: int) -> np.ndarray:
+    # np.round scales by 10**ndigits before rounding, which can tip a value sitting next to a
+    # half the other way; redo those few with round() so every value matches round(v, ndigits)
+    out = np.round(values, ndigits)
+    scaled = values * 10.0 ** ndigits
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) <= 1e-12 * np.maximum(np.abs(scaled), 1.0)
+    for i in np.flatnonzero(near_half).tolist():
+        out[i] = round(float(values[i]), ndigits)
+    return out
+
+
+@dataclass(slots=True)
+class BacktestTradeColumns:
+    entry_time: List[str] = field(default_factory=list)
+    exit_time: List[str] = field(default_factory=list)
+    entry_price: np.ndarray = field(default_factory=_empty_f8)
+    exit_price: np.ndarray = field(default_factory=_empty_f8)
+    quantity: np.ndarray = field(default_factory=_empty_f8)
+    pnl: np.ndarray = field(default_factory=_empty_f8)
+    commission: np.ndarray = field(default_factory=_empty_f8)
+    return_pct: np.ndarray = field(default_factory=_empty_f8)
+
+    def __len__(self) -> int:
+        return len(self.pnl)
+
+    def records(self) -> List[dict]:
+        return [
+            {
+                "entry_price": ep, "exit_price": xp, "quantity": q,
+                "entry_time": et, "exit_time": xt,
+                "pnl": pnl, "commission": c, "return_pct": r,
+            }
+            for et, xt, ep, xp, q, pnl, c, r in zip(
+                self.entry_time, self.exit_time,
+                _round(self.entry_price, 4).tolist(), _round(self.exit_price, 4).tolist(),
+                _round(self.quantity, 6).tolist(), _round(self.pnl, 2).tolist(),
+                _round(self.commission, 2).tolist(), _round(self.return_pct, 6).tolist(),
+            )
+        ]
+
+
+@dataclass(slots=True)
 class BacktestResult:
     strategy_name: str
     symbol: str
@@ -45,8 +113,17 @@ class BacktestResult:
     avg_win: float
     avg_loss: float
     profit_factor: float
-    trades: List[BacktestTrade] = field(default_factory=list)
-    equity_curve: List[dict] = field(default_factory=list)
+    trade_columns: BacktestTradeColumns = field(default_factory=BacktestTradeColumns)
+    equity_dates: List[str] = field(default_factory=list)
+    equity_values: np.ndarray = field(default_factory=_empty_f8)
+
+    @property
+    def trades(self) -> List[BacktestTrade]:
+        return [BacktestTrade(symbol=self.symbol, side="BUY", **r) for r in self.trade_columns.records()]
+
+    @property
+    def equity_curve(self) -> List[dict]:
+        return [{"date": d, "equity": v} for d, v in zip(self.equity_dates, _round(self.equity_values, 2).tolist())]
 
     def to_dict(self) -> dict:
         return {
@@ -67,10 +144,97 @@ class BacktestResult:
             "avg_win": round(self.avg_win, 2),
             "avg_loss": round(self.avg_loss, 2),
             "profit_factor": round(self.profit_factor, 4),
-            "trades": [t.__dict__ for t in self.trades],
+            "trades": [{"symbol": self.symbol, "side": "BUY", **r} for r in self.trade_columns.records()],
             "equity_curve": self.equity_curve,
         }
 
+    def persist(self, session: Session) -> int:
+        from app.models.trade import OrderSide, OrderStatus, Trade
+
+        cols = self.trade_columns
+        rows = [
+            {
+                "symbol": self.symbol, "side": OrderSide.SELL.value, "quantity": q, "price": px,
+                "commission": c, "pnl": pnl, "status": OrderStatus.FILLED.value, "strategy": self.strategy_name,
+            }
+            for q, px, c, pnl in zip(
+                _round(cols.quantity, 6).tolist(), _round(cols.exit_price, 4).tolist(),
+                _round(cols.commission, 2).tolist(), _round(cols.pnl, 2).tolist(),
+            )
+        ]
+        if rows:
+            session.bulk_insert_mappings(Trade, rows)
+            session.commit()
+        return len(rows)
+
+
+def _header_types(raw: bytes) -> dict:
+    # OHLCV columns as float64; everything else (dates included) stays text, as pd.read_csv
+    # leaves it, so validate_dataframe parses timestamps and keeps their original UTC offsets
+    end = raw.find(b"\n")
+    header = (raw if end < 0 else raw[:end]).decode("utf-8", "replace")
+    names = next(csv.reader([header]), [])
+    return {n: pa.float64() if n.strip().lower() in _OHLCV else pa.string() for n in names}
+
+
+def _iso_strings(index: pd.DatetimeIndex) -> List[str]:
+    if index.tz is None:
+        values = index.to_numpy()
+        if (values == values.astype("datetime64[s]")).all():
+            return np.datetime_as_string(values, unit="s").tolist()
+    return [ts.isoformat() for ts in index]
+
+
+def _align_signals(batch: SignalBatch, index: pd.DatetimeIndex) -> np.ndarray:
+    sig_arr = np.full(len(index), HOLD, dtype=np.int8)
+    if not len(batch):
+        return sig_arr
+    codes = np.where(batch.is_buy, BUY, SELL).astype(np.int8)
+    if index.is_unique:
+        if batch.bars is not None:
+            # The batch was built from this same validated frame, so its bar positions line up
+            sig_arr[batch.bars] = codes
+            return sig_arr
+        idx = index.get_indexer(batch.timestamps)
+        hit = idx >= 0
+        sig_arr[idx[hit]] = codes[hit]
+        return sig_arr
+    # Repeated timestamps: a signal applies to every bar stamped with its time and the last
+    # signal at a time wins, as the timestamp-keyed lookup always did, whatever built the batch
+    # (the index is sorted by validate_dataframe)
+    lo = index.searchsorted(batch.timestamps, side="left")
+    hi = index.searchsorted(batch.timestamps, side="right")
+    for start, stop, code in zip(lo.tolist(), hi.tolist(), codes.tolist()):
+        sig_arr[start:stop] = code
+    return sig_arr
+
+
+def _frame_digest(df: pd.DataFrame) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(df.index.asi8.tobytes())
+    h.update(np.ascontiguousarray(df[_OHLCV].to_numpy(dtype=np.float64)).tobytes())
+    return h.hexdigest()
+
+
+def _strategy_params(strategy: BaseStrategy) -> str:
+    # Public attributes as they are now, so parameters changed after __init__ get their own entry
+    return repr(sorted((k, v) for k, v in vars(strategy).items() if not k.startswith("_")))
+
+
+def _cached_signals(strategy: BaseStrategy, df: pd.DataFrame, symbol: str) -> np.ndarray:
+    key = (type(strategy).__qualname__, _strategy_params(strategy), symbol, _frame_digest(df))
+    with _signal_cache_lock:
+        sig_arr = _signal_cache.get(key)
+        if sig_arr is not None:
+            _signal_cache.move_to_end(key)
+            return sig_arr
+    sig_arr = _align_signals(strategy.generate_signal_batch(df, symbol), df.index)
+    with _signal_cache_lock:
+        _signal_cache[key] = sig_arr
+        if len(_signal_cache) > _SIGNAL_CACHE_SIZE:
+            _signal_cache.popitem(last=False)
+    return sig_arr
+
 
 class BacktestEngine:
     def __init__(
@@ -90,139 +254,96 @@ class BacktestEngine:
         self.stop_loss_pct = stop_loss_pct if stop_loss_pct is not None else settings.STOP_LOSS_PCT
 
     def run(self, df: pd.DataFrame, symbol: str) -> BacktestResult:
-        df = self.strategy.validate_dataframe(df)
-        signals = self.strategy.generate_signals(df, symbol)
-
-        capital = self.initial_capital
-        position_qty = 0.0
-        entry_price = 0.0
-        entry_time = ""
-        trades: List[BacktestTrade] = []
-        equity_curve: List[dict] = []
-
-        signal_map: dict[str, Signal] = {}
-        for sig in signals:
-            signal_map[sig.timestamp.isoformat()] = sig.signal
-
-        for ts, row in df.iterrows():
-            close = float(row["close"])
-            ts_str = pd.Timestamp(ts).isoformat()
-            sig = signal_map.get(ts_str, Signal.HOLD)
-
-            # Check stop-loss
-            if position_qty > 0:
-                stop_price = entry_price * (1 - self.stop_loss_pct)
-                if close <= stop_price:
-                    exit_price = close * (1 - self.slippage_pct)
-                    commission = exit_price * position_qty * self.commission_pct
-                    pnl = (exit_price - entry_price) * position_qty - commission
-                    ret_pct = (exit_price - entry_price) / entry_price if entry_price else 0
-                    trades.append(BacktestTrade(
-                        symbol=symbol, side="BUY",
-                        entry_price=round(entry_price, 4),
-                        exit_price=round(exit_price, 4),
-                        quantity=round(position_qty, 6),
-                        entry_time=entry_time, exit_time=ts_str,
-                        pnl=round(pnl, 2), commission=round(commission, 2),
-                        return_pct=round(ret_pct, 6),
-                    ))
-                    capital += pnl
-                    position_qty = 0.0
-                    entry_price = 0.0
-
-            # Process signals
-            if sig == Signal.BUY and position_qty == 0:
-                buy_price = close * (1 + self.slippage_pct)
-                risk_amount = capital * self.risk_per_trade
-                stop_dist = buy_price * self.stop_loss_pct
-                qty = risk_amount / stop_dist if stop_dist > 0 else 0
-                max_qty = (capital * 0.95) / buy_price if buy_price > 0 else 0
-                qty = min(qty, max_qty)
-                if qty > 0:
-                    commission = buy_price * qty * self.commission_pct
-                    capital -= commission
-                    position_qty = qty
-                    entry_price = buy_price
-                    entry_time = ts_str
-
-            elif sig == Signal.SELL and position_qty > 0:
-                exit_price = close * (1 - self.slippage_pct)
-                commission = exit_price * position_qty * self.commission_pct
-                pnl = (exit_price - entry_price) * position_qty - commission
-                ret_pct = (exit_price - entry_price) / entry_price if entry_price else 0
-                trades.append(BacktestTrade(
-                    symbol=symbol, side="BUY",
-                    entry_price=round(entry_price, 4),
-                    exit_price=round(exit_price, 4),
-                    quantity=round(position_qty, 6),
-                    entry_time=entry_time, exit_time=ts_str,
-                    pnl=round(pnl, 2), commission=round(commission, 2),
-                    return_pct=round(ret_pct, 6),
-                ))
-                capital += pnl
-                position_qty = 0.0
-                entry_price = 0.0
-
-            mark = capital + (position_qty * close if position_qty > 0 else 0)
-            equity_curve.append({"date": ts_str, "equity": round(mark, 2)})
-
-        # Close remaining position at last bar
-        if position_qty > 0:
-            last_close = float(df.iloc[-1]["close"])
-            exit_price = last_close * (1 - self.slippage_pct)
-            commission = exit_price * position_qty * self.commission_pct
-            pnl = (exit_price - entry_price) * position_qty - commission
-            ret_pct = (exit_price - entry_price) / entry_price if entry_price else 0
-            trades.append(BacktestTrade(
-                symbol=symbol, side="BUY",
-                entry_price=round(entry_price, 4),
-                exit_price=round(exit_price, 4),
-                quantity=round(position_qty, 6),
-                entry_time=entry_time,
-                exit_time=pd.Timestamp(df.index[-1]).isoformat(),
-                pnl=round(pnl, 2), commission=round(commission, 2),
-                return_pct=round(ret_pct, 6),
-            ))
-            capital += pnl
-
-        return self._compute_stats(capital, trades, equity_curve, symbol, df)
-
-    def run_from_csv(self, csv_text: str, symbol: str) -> BacktestResult:
-        df = pd.read_csv(io.StringIO(csv_text))
+        df = self.strategy.validate_dataframe(df, copy=False)
+        sig_arr = _cached_signals(self.strategy, df, symbol)
+
+        closes = df["close"].to_numpy(dtype=np.float64, copy=True)
+        ts_strs = _iso_strings(df.index)
+
+        capital, entry_idx, exit_idx, entry_px, exit_px, qtys, pnls, comms, equity = simulate(
+            closes, sig_arr,
+            self.initial_capital, self.commission_pct, self.slippage_pct,
+            self.risk_per_trade, self.stop_loss_pct,
+        )
+
+        trades = BacktestTradeColumns(
+            entry_time=[ts_strs[i] for i in entry_idx.tolist()],
+            exit_time=[ts_strs[i] for i in exit_idx.tolist()],
+            entry_price=entry_px,
+            exit_price=exit_px,
+            quantity=qtys,
+            pnl=pnls,
+            commission=comms,
+            return_pct=np.divide(exit_px - entry_px, entry_px, out=np.zeros_like(entry_px), where=entry_px != 0),
+        )
+        return self._compute_stats(capital, trades, ts_strs, equity, symbol, df)
+
+    def run_batch(self, items: List[Tuple[pd.DataFrame, str]], max_workers: Optional[int] = None) -> List[BacktestResult]:
+        if len(items) <= 1:
+            return [self.run(df, symbol) for df, symbol in items]
+        workers = min(max_workers or os.cpu_count() or 1, len(items))
+        # Spawned, not forked: callers may hold threads (uvicorn, the process_bars pool) or locks
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(self.run, df, symbol) for df, symbol in items]
+            return [f.result() for f in futures]
+
+    def run_from_csv(self, csv_data: Union[str, bytes], symbol: str) -> BacktestResult:
+        raw = csv_data.encode("utf-8") if isinstance(csv_data, str) else csv_data
+        df = None
+        if pa_csv is not None:
+            # Pin every column's type so Arrow skips type inference on them
+            convert = pa_csv.ConvertOptions(column_types=_header_types(raw))
+            try:
+                df = pa_csv.read_csv(pa.py_buffer(raw), convert_options=convert).to_pandas(date_as_object=False)
+            except pa.ArrowInvalid:
+                # Ragged or truncated rows: let the more lenient pandas parser have a go
+                df = None
+        if df is None:
+            df = pd.read_csv(io.BytesIO(raw))
         return self.run(df, symbol)
 
     def _compute_stats(
         self,
         final_capital: float,
-        trades: List[BacktestTrade],
-        equity_curve: List[dict],
+        trades: BacktestTradeColumns,
+        equity_dates: List[str],
+        equities: np.ndarray,
         symbol: str,
         df: pd.DataFrame,
     ) -> BacktestResult:
+        # The pure-Python kernel (no numba) hands back an np.float64; keep the stats plain floats
+        final_capital = float(final_capital)
         total_return = (final_capital - self.initial_capital) / self.initial_capital
 
         ann_return = 0.0
         sharpe = 0.0
         max_dd = 0.0
 
-        if len(equity_curve) > 1:
-            equities = pd.Series([e["equity"] for e in equity_curve])
-            daily_returns = equities.pct_change().dropna()
-            trading_days = len(equity_curve)
+        if len(equities) > 1:
+            # Stats are taken over the curve as reported, to the cent
+            equities = _round(equities, 2)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                daily_returns = np.diff(equities) / equities[:-1]
+            daily_returns = daily_returns[~np.isnan(daily_returns)]
+            trading_days = len(equities)
             years = trading_days / 252 if trading_days > 0 else 1
             ann_return = (1 + total_return) ** (1 / max(years, 0.01)) - 1
-            if daily_returns.std() > 0:
-                sharpe = float((daily_returns.mean() / daily_returns.std()) * np.sqrt(252))
-            running_max = equities.cummax()
+            std = daily_returns.std(ddof=1) if len(daily_returns) > 1 else 0.0
+            if std > 0:
+                sharpe = float(daily_returns.mean() / std * np.sqrt(252))
+            running_max = np.maximum.accumulate(equities)
             drawdown = (equities - running_max) / running_max
             max_dd = float(drawdown.min())
 
-        wins = [t for t in trades if t.pnl > 0]
-        losses = [t for t in trades if t.pnl <= 0]
-        avg_win = float(np.mean([t.pnl for t in wins])) if wins else 0.0
-        avg_loss = float(np.mean([abs(t.pnl) for t in losses])) if losses else 0.0
-        total_win_pnl = sum(t.pnl for t in wins)
-        total_loss_pnl = sum(abs(t.pnl) for t in losses)
+        # Win/loss counts and averages use the per-trade pnl as reported, to the cent
+        pnls = _round(trades.pnl, 2)
+        win_mask = pnls > 0
+        n_wins = int(win_mask.sum())
+        n_losses = len(pnls) - n_wins
+        total_win_pnl = float(pnls[win_mask].sum())
+        total_loss_pnl = float(-pnls[~win_mask].sum())
+        avg_win = total_win_pnl / n_wins if n_wins else 0.0
+        avg_loss = total_loss_pnl / n_losses if n_losses else 0.0
         profit_factor = total_win_pnl / total_loss_pnl if total_loss_pnl > 0 else 9999.99
 
         start_date = str(df.index[0]) if len(df) > 0 else ""
@@ -234,18 +355,19 @@ class BacktestEngine:
             start_date=start_date,
             end_date=end_date,
             initial_capital=self.initial_capital,
-            final_equity=round(final_capital, 2),
+            final_equity=final_capital,
             total_return_pct=total_return,
             annualized_return_pct=ann_return,
             sharpe_ratio=sharpe,
             max_drawdown_pct=max_dd,
             total_trades=len(trades),
-            winning_trades=len(wins),
-            losing_trades=len(losses),
-            win_rate=len(wins) / len(trades) if trades else 0.0,
+            winning_trades=n_wins,
+            losing_trades=n_losses,
+            win_rate=n_wins / len(trades) if trades else 0.0,
             avg_win=avg_win,
             avg_loss=avg_loss,
             profit_factor=profit_factor,
-            trades=trades,
-            equity_curve=equity_curve,
+            trade_columns=trades,
+            equity_dates=equity_dates,
+            equity_values=equities,
         )
@@ -1,7 +1,22 @@
 # app/broker/base.py
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List, Optional
+from enum import IntEnum
+from typing import List, Optional, Union
+
+
+class Side(IntEnum):
+    BUY = 0
+    SELL = 1
+
+    @classmethod
+    def parse(cls, side: Union["Side", str]) -> "Side":
+        if isinstance(side, Side):
+            return side
+        try:
+            return cls[side.upper()]
+        except KeyError:
+            raise ValueError(f"Unknown order side: {side}") from None
 
 
 @dataclass
@@ -29,7 +44,7 @@ class PositionInfo:
 
 class BaseBroker(ABC):
     @abstractmethod
-    def place_order(self, symbol: str, side: str, quantity: float, price: float, stop_loss: Optional[float] = None) -> OrderResult:
+    def place_order(self, symbol: str, side: Union[Side, str], quantity: float, price: float, stop_loss: Optional[float] = None) -> OrderResult:
         pass
 
     @abstractmethod
@@ -47,3 +62,12 @@ class BaseBroker(ABC):
     @abstractmethod
     def get_portfolio_value(self) -> float:
         pass
+
+    def get_position(self, symbol: str) -> Optional[PositionInfo]:
+        return next((p for p in self.get_positions() if p.symbol == symbol), None)
+
+    def get_exposure(self) -> float:
+        return sum(p.current_price * p.quantity for p in self.get_positions())
+
+    def get_position_count(self) -> int:
+        return len(self.get_positions())
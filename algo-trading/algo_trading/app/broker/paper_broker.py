@@ -1,26 +1,19 @@
 # app/broker/paper_broker.py
 from __future__ import annotations
 
+import itertools
 import uuid
-from typing import Dict, List, Optional
+from typing import Dict, List, Mapping, Optional
 
-from app.broker.base import BaseBroker, OrderResult, PositionInfo
-from app.config import settings
-
-
-class _OpenPos:
-    __slots__ = ("symbol", "side", "quantity", "entry_price", "current_price", "stop_loss")
+import numpy as np
 
-    def __init__(self, symbol: str, side: str, quantity: float, entry_price: float, current_price: float, stop_loss: float | None) -> None:
-        self.symbol = symbol
-        self.side = side
-        self.quantity = quantity
-        self.entry_price = entry_price
-        self.current_price = current_price
-        self.stop_loss = stop_loss
+from app.broker.base import BaseBroker, OrderResult, PositionInfo, Side
+from app.config import settings
 
 
 class PaperBroker(BaseBroker):
+    _INITIAL_CAPACITY = 16
+
     def __init__(
         self,
         initial_capital: float | None = None,
@@ -31,70 +24,161 @@ class PaperBroker(BaseBroker):
         self.cash = self.initial_capital
         self.commission_pct = commission_pct if commission_pct is not None else settings.COMMISSION_PCT
         self.slippage_pct = slippage_pct if slippage_pct is not None else settings.SLIPPAGE_PCT
-        self._positions: Dict[str, _OpenPos] = {}
+        # Open positions as parallel columns; _index maps symbol -> row, rows [0, _n) are live
+        self._symbols: List[str] = []
+        self._index: Dict[str, int] = {}
+        self._n = 0
+        self._qty = np.empty(self._INITIAL_CAPACITY, dtype=np.float64)
+        self._entry = np.empty(self._INITIAL_CAPACITY, dtype=np.float64)
+        self._current = np.empty(self._INITIAL_CAPACITY, dtype=np.float64)
+        self._stop = np.empty(self._INITIAL_CAPACITY, dtype=np.float64)
         self._trade_log: List[OrderResult] = []
+        # Sequence numbers behind a random per-broker prefix: cheap, yet unique across workers and restarts
+        self._order_prefix = uuid.uuid4().hex[:12]
+        self._order_seq = itertools.count(1)
+        self._position_mtm = 0.0
 
-    def place_order(self, symbol: str, side: str, quantity: float, price: float, stop_loss: Optional[float] = None) -> OrderResult:
-        side = side.upper()
-        oid = str(uuid.uuid4())
+    def _next_order_id(self) -> str:
+        return f"{self._order_prefix}-{next(self._order_seq)}"
 
-        fill = price * (1 + self.slippage_pct) if side == "BUY" else price * (1 - self.slippage_pct)
+    def place_order(self, symbol: str, side: Side | str, quantity: float, price: float, stop_loss: Optional[float] = None) -> OrderResult:
+        side = Side.parse(side)
+        oid = self._next_order_id()
+
+        # +slippage on buys, -slippage on sells
+        fill = price * (1 + (1 - 2 * side) * self.slippage_pct)
         cost = fill * quantity
         comm = cost * self.commission_pct
 
-        if side == "BUY":
+        if side is Side.BUY:
             if cost + comm > self.cash:
-                return OrderResult(oid, symbol, side, 0, fill, "REJECTED", 0, f"Insufficient funds: need {cost+comm:.2f}, have {self.cash:.2f}")
+                return OrderResult(oid, symbol, side.name, 0, fill, "REJECTED", 0, f"Insufficient funds: need {cost+comm:.2f}, have {self.cash:.2f}")
             self.cash -= cost + comm
-            if symbol in self._positions:
-                p = self._positions[symbol]
-                new_qty = p.quantity + quantity
-                p.entry_price = (p.entry_price * p.quantity + fill * quantity) / new_qty
-                p.quantity = new_qty
-                p.stop_loss = stop_loss
+            i = self._index.get(symbol)
+            if i is not None:
+                held = float(self._qty[i])
+                new_qty = held + quantity
+                self._entry[i] = (float(self._entry[i]) * held + fill * quantity) / new_qty
+                self._qty[i] = new_qty
+                self._stop[i] = np.nan if stop_loss is None else stop_loss
+                self._position_mtm += float(self._current[i]) * quantity
             else:
-                self._positions[symbol] = _OpenPos(symbol, "BUY", quantity, fill, fill, stop_loss)
+                self._append(symbol, quantity, fill, stop_loss)
+                self._position_mtm += fill * quantity
         else:
-            if symbol not in self._positions:
-                return OrderResult(oid, symbol, side, 0, fill, "REJECTED", 0, f"No open position for {symbol}")
-            p = self._positions[symbol]
-            sell_qty = min(quantity, p.quantity)
+            i = self._index.get(symbol)
+            if i is None:
+                return OrderResult(oid, symbol, side.name, 0, fill, "REJECTED", 0, f"No open position for {symbol}")
+            held = float(self._qty[i])
+            sell_qty = min(quantity, held)
             self.cash += fill * sell_qty - comm
-            p.quantity -= sell_qty
-            if p.quantity <= 1e-9:
-                del self._positions[symbol]
-
-        r = OrderResult(oid, symbol, side, quantity, round(fill, 4), "FILLED", round(comm, 4), "Order filled")
+            self._qty[i] = held - sell_qty
+            self._position_mtm -= float(self._current[i]) * sell_qty
+            if held - sell_qty <= 1e-9:
+                self._remove(i)
+                if not self._n:
+                    self._position_mtm = 0.0
+
+        r = OrderResult(oid, symbol, side.name, quantity, round(fill, 4), "FILLED", round(comm, 4), "Order filled")
         self._trade_log.append(r)
         return r
 
+    def _append(self, symbol: str, quantity: float, price: float, stop_loss: Optional[float]) -> None:
+        i = self._n
+        if i == self._qty.shape[0]:
+            cap = 2 * i
+            for name in ("_qty", "_entry", "_current", "_stop"):
+                col = np.empty(cap, dtype=np.float64)
+                col[:i] = getattr(self, name)
+                setattr(self, name, col)
+        self._symbols.append(symbol)
+        self._index[symbol] = i
+        self._qty[i] = quantity
+        self._entry[i] = price
+        self._current[i] = price
+        self._stop[i] = np.nan if stop_loss is None else stop_loss
+        self._n = i + 1
+
+    def _remove(self, i: int) -> None:
+        # Shift the later rows down one so rows stay contiguous and in the order they were opened
+        n = self._n
+        for col in (self._qty, self._entry, self._current, self._stop):
+            col[i:n - 1] = col[i + 1:n]
+        del self._index[self._symbols.pop(i)]
+        for j in range(i, n - 1):
+            self._index[self._symbols[j]] = j
+        self._n = n - 1
+
+    def _columns(self):
+        n = self._n
+        qty, entry, current = self._qty[:n], self._entry[:n], self._current[:n]
+        pnl = (current - entry) * qty
+        stops = [None if s != s else s for s in self._stop[:n].tolist()]
+        return qty.tolist(), entry.tolist(), current.tolist(), pnl.tolist(), stops
+
     def close_position(self, symbol: str, price: float) -> OrderResult:
-        if symbol not in self._positions:
-            return OrderResult(str(uuid.uuid4()), symbol, "SELL", 0, price, "REJECTED", 0, f"No position for {symbol}")
-        return self.place_order(symbol, "SELL", self._positions[symbol].quantity, price)
+        i = self._index.get(symbol)
+        if i is None:
+            return OrderResult(self._next_order_id(), symbol, "SELL", 0, price, "REJECTED", 0, f"No position for {symbol}")
+        return self.place_order(symbol, Side.SELL, float(self._qty[i]), price)
 
     def get_positions(self) -> List[PositionInfo]:
-        out: List[PositionInfo] = []
-        for p in self._positions.values():
-            pnl = (p.current_price - p.entry_price) * p.quantity
-            out.append(PositionInfo(p.symbol, p.side, round(p.quantity, 6), round(p.entry_price, 4), round(p.current_price, 4), round(pnl, 2), p.stop_loss))
-        return out
+        qty, entry, current, pnl, stops = self._columns()
+        return [
+            PositionInfo(s, "BUY", round(q, 6), round(e, 4), round(c, 4), round(u, 2), sl)
+            for s, q, e, c, u, sl in zip(self._symbols, qty, entry, current, pnl, stops)
+        ]
+
+    def get_position(self, symbol: str) -> Optional[PositionInfo]:
+        i = self._index.get(symbol)
+        if i is None:
+            return None
+        q, e, c = float(self._qty[i]), float(self._entry[i]), float(self._current[i])
+        stop = float(self._stop[i])
+        return PositionInfo(symbol, "BUY", round(q, 6), round(e, 4), round(c, 4), round((c - e) * q, 2), None if stop != stop else stop)
+
+    def get_positions_dict(self) -> List[dict]:
+        qty, entry, current, pnl, stops = self._columns()
+        return [
+            {"symbol": s, "side": "BUY", "quantity": round(q, 6), "entry_price": round(e, 4), "current_price": round(c, 4), "unrealized_pnl": round(u, 2), "stop_loss": sl}
+            for s, q, e, c, u, sl in zip(self._symbols, qty, entry, current, pnl, stops)
+        ]
 
     def update_price(self, symbol: str, price: float) -> None:
-        if symbol in self._positions:
-            self._positions[symbol].current_price = price
+        i = self._index.get(symbol)
+        if i is not None:
+            self._position_mtm += (price - float(self._current[i])) * float(self._qty[i])
+            self._current[i] = price
+
+    def update_prices_bulk(self, prices: Mapping[str, float]) -> int:
+        rows = [(self._index[sym], px) for sym, px in prices.items() if sym in self._index]
+        if not rows:
+            return 0
+        idx, px = zip(*rows)
+        self._current[list(idx)] = px
+        n = self._n
+        self._position_mtm = float(self._qty[:n] @ self._current[:n])
+        return len(rows)
 
     def get_balance(self) -> float:
         return round(self.cash, 2)
 
     def get_portfolio_value(self) -> float:
-        pos_val = sum(p.current_price * p.quantity for p in self._positions.values())
-        return round(self.cash + pos_val, 2)
+        return round(self.cash + self._position_mtm, 2)
+
+    def get_exposure(self) -> float:
+        return self._position_mtm
+
+    def get_position_count(self) -> int:
+        return self._n
 
     def get_trade_log(self) -> List[dict]:
         return [{"order_id": r.order_id, "symbol": r.symbol, "side": r.side, "quantity": r.quantity, "price": r.price, "status": r.status, "commission": r.commission, "message": r.message} for r in self._trade_log]
 
     def reset(self) -> None:
         self.cash = self.initial_capital
-        self._positions.clear()
+        self._symbols.clear()
+        self._index.clear()
+        self._n = 0
         self._trade_log.clear()
+        self._position_mtm = 0.0
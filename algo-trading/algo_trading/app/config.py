@@ -1,11 +1,15 @@
 # app/config.py
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 
 
 @dataclass
 class Settings:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./algo_trading.db")
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "20"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
     INITIAL_CAPITAL: float = float(os.getenv("INITIAL_CAPITAL", "100000.0"))
     RISK_PER_TRADE: float = float(os.getenv("RISK_PER_TRADE", "0.02"))
     STOP_LOSS_PCT: float = float(os.getenv("STOP_LOSS_PCT", "0.03"))
@@ -16,6 +20,16 @@ class Settings:
     SLIPPAGE_PCT: float = float(os.getenv("SLIPPAGE_PCT", "0.0005"))
     HOST: str = os.getenv("HOST", "0.0.0.0")
     PORT: int = int(os.getenv("PORT", "8000"))
+    # 0 = one worker per CPU core; each worker holds its own in-memory broker
+    WORKERS: int = int(os.getenv("WORKERS", "1"))
+    # Backtest processes per worker; 0 = split the CPU cores evenly across the workers
+    BACKTEST_WORKERS: int = int(os.getenv("BACKTEST_WORKERS", "0"))
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
 
 
-settings = Settings()
+@lru_cache(maxsize=1)
+def get_settings() -> Settings:
+    return Settings()
+
+
+settings = get_settings()
@@ -1,19 +1,65 @@
 # app/database.py
-from sqlalchemy import create_engine
+from typing import AsyncIterator
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.sql import functions
 from app.config import settings
 
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg"}
+
+db_url = make_url(settings.DATABASE_URL)
+backend = db_url.get_backend_name()
+async_db_url = db_url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}") if backend in _ASYNC_DRIVERS else db_url
+is_sqlite = backend == "sqlite"
+sqlite_in_memory = is_sqlite and db_url.database in (None, "", ":memory:")
+
 connect_args = {}
-if "sqlite" in settings.DATABASE_URL:
+pool_args = {}
+if is_sqlite:
     connect_args["check_same_thread"] = False
+if not sqlite_in_memory:
+    pool_args = {"pool_size": settings.DB_POOL_SIZE, "max_overflow": settings.DB_MAX_OVERFLOW, "pool_recycle": settings.DB_POOL_RECYCLE}
 
 engine = create_engine(
     settings.DATABASE_URL,
     connect_args=connect_args,
     pool_pre_ping=True,
+    **pool_args,
+)
+
+# aiosqlite runs on NullPool, which takes no sizing arguments
+async_engine = create_async_engine(
+    async_db_url,
+    connect_args=connect_args,
+    pool_pre_ping=True,
+    **({} if is_sqlite else pool_args),
 )
 
+
+@compiles(functions.now, "sqlite")
+def _sqlite_now(_element, _compiler, **_kw) -> str:
+    # CURRENT_TIMESTAMP is only second-resolution on SQLite; keep milliseconds for ordering
+    return "(strftime('%Y-%m-%d %H:%M:%f', 'now'))"
+
+
+def _sqlite_pragmas(dbapi_conn, _record) -> None:
+    # WAL + NORMAL sync: commits append to the log instead of fsyncing the main file
+    cur = dbapi_conn.cursor()
+    cur.execute("PRAGMA journal_mode=WAL")
+    cur.execute("PRAGMA synchronous=NORMAL")
+    cur.close()
+
+
+if is_sqlite and not sqlite_in_memory:
+    event.listen(engine, "connect", _sqlite_pragmas)
+    event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas)
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 
@@ -25,6 +71,11 @@ def get_db():
         db.close()
 
 
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db() -> None:
     import app.models.trade  # noqa: F401 — ensure models are registered
     Base.metadata.create_all(bind=engine)
@@ -1,40 +1,93 @@
 # app/main.py
 from __future__ import annotations
 
+import asyncio
 import io
+import multiprocessing
+import os
+import uuid
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
-from typing import Optional
+from typing import List, Optional
 
+import orjson
 import pandas as pd
 import uvicorn
-from fastapi import Depends, FastAPI, File, HTTPException, Query, UploadFile
+from fastapi import Depends, FastAPI, File, HTTPException, Query, Response, UploadFile, WebSocket, status
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from sqlalchemy.orm import Session
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel, ConfigDict, Field
+from sqlalchemy import delete, insert, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.backtesting.engine import BacktestEngine
 from app.broker.paper_broker import PaperBroker
 from app.config import settings
-from app.database import get_db, init_db
+from app.database import get_async_db, init_db
 from app.models.trade import Position, Trade
 from app.risk.manager import RiskManager
 from app.strategies.moving_average import MovingAverageCrossover, RSIMeanReversion
 
+# Startup-time config, read once instead of per request
+_INIT_CAP = settings.INITIAL_CAPITAL
+_SHORT_W = settings.SHORT_WINDOW
+_LONG_W = settings.LONG_WINDOW
+
 # ── Singletons ──────────────────────────────────────────────────────────────
-broker = PaperBroker()
-risk_mgr = RiskManager()
+# One instance per worker process; the lock serialises handlers that mutate broker state.
+# The providers are async so FastAPI resolves them on the event loop, not in the threadpool.
+_broker = PaperBroker()
+_risk_manager = RiskManager()
+_broker_lock = asyncio.Lock()
+
+
+async def get_broker() -> PaperBroker:
+    return _broker
+
+
+async def get_risk_manager() -> RiskManager:
+    return _risk_manager
+
+
+async def get_broker_lock() -> asyncio.Lock:
+    return _broker_lock
+
 
 available_strategies = {
     "ma_crossover": MovingAverageCrossover(),
     "rsi_mean_reversion": RSIMeanReversion(),
 }
 
+# Static payloads, encoded once at import
+_HEALTH_BYTES = orjson.dumps({"status": "ok", "version": "2.0.0"})
+_STRATEGIES_BYTES = orjson.dumps({
+    "strategies": [
+        {"key": "ma_crossover", "name": available_strategies["ma_crossover"].name, "params": {"short_window": _SHORT_W, "long_window": _LONG_W}},
+        {"key": "rsi_mean_reversion", "name": available_strategies["rsi_mean_reversion"].name, "params": {"period": 14, "oversold": 30, "overbought": 70}},
+    ]
+})
+
 
 # ── App lifecycle ───────────────────────────────────────────────────────────
+def _backtest_workers() -> int:
+    # Every uvicorn worker owns a pool, so share the cores between them rather than cpu_count each
+    if settings.BACKTEST_WORKERS > 0:
+        return settings.BACKTEST_WORKERS
+    cpus = os.cpu_count() or 1
+    return max(1, cpus // (settings.WORKERS or cpus))
+
+
 @asynccontextmanager
 async def lifespan(_app: FastAPI):
     init_db()
-    yield
+    # Backtests are CPU-bound; run them off the event loop in separate processes. Spawn them
+    # fresh rather than forking a process that already runs the event loop and its threads.
+    _app.state.pool = ProcessPoolExecutor(max_workers=_backtest_workers(), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        yield
+    finally:
+        _app.state.pool.shutdown(cancel_futures=True)
 
 
 app = FastAPI(
@@ -42,6 +95,7 @@ app = FastAPI(
     version="2.0.0",
     description="Production algorithmic trading backend",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
@@ -51,10 +105,13 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
 
 
 # ── Pydantic schemas ───────────────────────────────────────────────────────
 class BacktestRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     strategy: str = Field("ma_crossover", description="ma_crossover | rsi_mean_reversion")
     symbol: str = Field("AAPL")
     short_window: Optional[int] = None
@@ -65,58 +122,75 @@ class BacktestRequest(BaseModel):
 
 
 class TradeRequest(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     symbol: str
-    side: str
+    side: str = Field(..., pattern="(?i)^(buy|sell)$")
     quantity: Optional[float] = None
     price: float
 
 
 class PriceUpdate(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     symbol: str
     price: float
 
 
 # ── Helpers ─────────────────────────────────────────────────────────────────
-def _make_strategy(req: BacktestRequest):
-    if req.strategy == "ma_crossover":
-        return MovingAverageCrossover(short_window=req.short_window, long_window=req.long_window)
-    if req.strategy == "rsi_mean_reversion":
-        return RSIMeanReversion(period=req.rsi_period or 14)
-    raise HTTPException(400, f"Unknown strategy: {req.strategy}. Options: ma_crossover, rsi_mean_reversion")
+def _make_strategy(strategy: str, short_window: Optional[int], long_window: Optional[int], rsi_period: Optional[int]):
+    if strategy == "ma_crossover":
+        return MovingAverageCrossover(short_window=short_window, long_window=long_window)
+    if strategy == "rsi_mean_reversion":
+        return RSIMeanReversion(period=rsi_period or 14)
+    raise HTTPException(400, f"Unknown strategy: {strategy}. Options: ma_crossover, rsi_mean_reversion")
+
+
+def _backtest_job(strat, csv_data, symbol: str, initial_capital: Optional[float]) -> dict:
+    engine = BacktestEngine(strategy=strat, initial_capital=initial_capital or _INIT_CAP)
+    return engine.run_from_csv(csv_data, symbol).to_dict()
+
+
+async def _run_backtest(strat, csv_data, symbol: str, initial_capital: Optional[float]) -> dict:
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(app.state.pool, _backtest_job, strat, csv_data, symbol, initial_capital)
+    except Exception as exc:
+        raise HTTPException(422, str(exc))
+
+
+def _merge_ticks(pending: dict, msg: dict) -> bool:
+    # Returns False once the client has disconnected
+    if msg["type"] == "websocket.disconnect":
+        return False
+    raw = msg.get("bytes") or msg.get("text")
+    for symbol, price in orjson.loads(raw):
+        pending[symbol] = float(price)
+    return True
 
 
 # ── Endpoints ───────────────────────────────────────────────────────────────
 @app.get("/")
 def root():
-    return {"status": "ok", "version": "2.0.0"}
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 @app.get("/health")
 def health():
-    return {"status": "ok", "version": "2.0.0"}
+    return Response(_HEALTH_BYTES, media_type="application/json")
 
 
 @app.get("/strategies")
 def list_strategies():
-    return {
-        "strategies": [
-            {"key": "ma_crossover", "name": available_strategies["ma_crossover"].name, "params": {"short_window": settings.SHORT_WINDOW, "long_window": settings.LONG_WINDOW}},
-            {"key": "rsi_mean_reversion", "name": available_strategies["rsi_mean_reversion"].name, "params": {"period": 14, "oversold": 30, "overbought": 70}},
-        ]
-    }
+    return Response(_STRATEGIES_BYTES, media_type="application/json")
 
 
 @app.post("/backtest")
-def run_backtest(req: BacktestRequest):
+async def run_backtest(req: BacktestRequest):
     if not req.csv_data:
         raise HTTPException(400, "csv_data is required (OHLCV CSV string)")
-    strat = _make_strategy(req)
-    engine = BacktestEngine(strategy=strat, initial_capital=req.initial_capital or settings.INITIAL_CAPITAL)
-    try:
-        result = engine.run_from_csv(req.csv_data, req.symbol)
-    except Exception as exc:
-        raise HTTPException(422, str(exc))
-    return result.to_dict()
+    strat = _make_strategy(req.strategy, req.short_window, req.long_window, req.rsi_period)
+    return await _run_backtest(strat, req.csv_data, req.symbol, req.initial_capital)
 
 
 @app.post("/backtest/upload")
@@ -129,88 +203,160 @@ async def backtest_upload(
     rsi_period: Optional[int] = Query(None),
     initial_capital: Optional[float] = Query(None),
 ):
-    content = (await file.read()).decode("utf-8")
-    req = BacktestRequest(strategy=strategy, symbol=symbol, short_window=short_window, long_window=long_window, rsi_period=rsi_period, initial_capital=initial_capital, csv_data=content)
-    return run_backtest(req)
+    content = await file.read()
+    if not content:
+        raise HTTPException(400, "Uploaded file is empty (expected OHLCV CSV)")
+    strat = _make_strategy(strategy, short_window, long_window, rsi_period)
+    return await _run_backtest(strat, content, symbol, initial_capital)
 
 
 @app.post("/trade")
-def execute_trade(req: TradeRequest, db: Session = Depends(get_db)):
+async def execute_trade(
+    req: TradeRequest,
+    db: AsyncSession = Depends(get_async_db),
+    broker: PaperBroker = Depends(get_broker),
+    risk_mgr: RiskManager = Depends(get_risk_manager),
+    lock: asyncio.Lock = Depends(get_broker_lock),
+):
     side = req.side.upper()
-    if side not in ("BUY", "SELL"):
-        raise HTTPException(400, "side must be BUY or SELL")
-
-    positions = broker.get_positions()
-    exposure = sum(p.current_price * p.quantity for p in positions)
-
-    if side == "BUY":
-        assessment = risk_mgr.assess_trade(req.price, side, exposure, len(positions))
-        if not assessment.approved:
-            raise HTTPException(400, assessment.reason)
-        qty = req.quantity or assessment.position_size
-        order = broker.place_order(req.symbol, side, qty, req.price, assessment.stop_loss_price)
-    else:
-        has = [p for p in positions if p.symbol == req.symbol]
-        if not has:
-            raise HTTPException(400, f"No open position for {req.symbol}")
-        order = broker.close_position(req.symbol, req.price)
-
-    if order.status == "FILLED":
-        pnl = 0.0
-        if side == "SELL":
-            for p in positions:
-                if p.symbol == req.symbol:
-                    pnl = (order.price - p.entry_price) * order.quantity
-                    break
-        db.add(Trade(symbol=order.symbol, side=order.side, quantity=order.quantity, price=order.price, commission=order.commission, pnl=round(pnl, 2), status=order.status, strategy="manual"))
-        db.commit()
-        risk_mgr.update_capital(broker.get_balance())
-
-    return {"order_id": order.order_id, "symbol": order.symbol, "side": order.side, "quantity": order.quantity, "price": order.price, "status": order.status, "commission": order.commission, "message": order.message}
+    async with lock:
+        if side == "BUY":
+            assessment = risk_mgr.assess_trade(req.price, side, broker.get_exposure(), broker.get_position_count())
+            if not assessment.approved:
+                raise HTTPException(400, assessment.reason)
+            qty = req.quantity or assessment.position_size
+            order = broker.place_order(req.symbol, side, qty, req.price, assessment.stop_loss_price)
+        else:
+            existing = broker.get_position(req.symbol)
+            if existing is None:
+                raise HTTPException(400, f"No open position for {req.symbol}")
+            order = broker.close_position(req.symbol, req.price)
+
+        if order.status == "FILLED":
+            pnl = (order.price - existing.entry_price) * order.quantity if side == "SELL" else 0.0
+            await db.execute(insert(Trade).values(symbol=order.symbol, side=order.side, quantity=order.quantity, price=order.price, commission=order.commission, pnl=round(pnl, 2), status=order.status, strategy="manual"))
+            await db.commit()
+            risk_mgr.update_capital(broker.get_balance())
+
+        return {"order_id": order.order_id, "symbol": order.symbol, "side": order.side, "quantity": order.quantity, "price": order.price, "status": order.status, "commission": order.commission, "message": order.message}
 
 
 @app.get("/positions")
-def get_positions():
-    return {"positions": [{"symbol": p.symbol, "side": p.side, "quantity": p.quantity, "entry_price": p.entry_price, "current_price": p.current_price, "unrealized_pnl": p.unrealized_pnl, "stop_loss": p.stop_loss} for p in broker.get_positions()]}
+async def get_positions(broker: PaperBroker = Depends(get_broker)):
+    return {"positions": broker.get_positions_dict()}
 
 
 @app.get("/performance")
-def get_performance():
+async def get_performance(broker: PaperBroker = Depends(get_broker)):
     pv = broker.get_portfolio_value()
     cash = broker.get_balance()
-    positions = broker.get_positions()
-    pos_val = sum(p.current_price * p.quantity for p in positions)
-    ret = (pv - settings.INITIAL_CAPITAL) / settings.INITIAL_CAPITAL
-    return {"portfolio_value": round(pv, 2), "cash": round(cash, 2), "position_value": round(pos_val, 2), "initial_capital": settings.INITIAL_CAPITAL, "total_return_pct": round(ret, 6), "open_positions": len(positions)}
+    ret = (pv - _INIT_CAP) / _INIT_CAP
+    return {"portfolio_value": round(pv, 2), "cash": round(cash, 2), "position_value": round(broker.get_exposure(), 2), "initial_capital": _INIT_CAP, "total_return_pct": round(ret, 6), "open_positions": broker.get_position_count()}
 
 
 @app.get("/trades")
-def get_trades(limit: int = Query(50, ge=1, le=500), symbol: Optional[str] = Query(None), db: Session = Depends(get_db)):
-    q = db.query(Trade).order_by(Trade.created_at.desc())
+async def get_trades(
+    limit: int = Query(50, ge=1, le=500),
+    symbol: Optional[str] = Query(None),
+    before: Optional[uuid.UUID] = Query(None, description="Return trades older than this trade id"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    q = select(*Trade.__table__.c).order_by(Trade.created_at.desc(), Trade.id.desc())
     if symbol:
-        q = q.filter(Trade.symbol == symbol)
-    return {"trades": [t.to_dict() for t in q.limit(limit).all()]}
+        q = q.where(Trade.symbol == symbol)
+    if before:
+        # An unknown cursor would otherwise compare against NULL and look like "no older trades"
+        if await db.scalar(select(Trade.id).where(Trade.id == before)) is None:
+            raise HTTPException(404, f"Trade {before} not found")
+        # Compare in SQL against the stored row so the timestamp keeps the database's own encoding
+        cursor = select(Trade.created_at, Trade.id).where(Trade.id == before).scalar_subquery()
+        q = q.where(tuple_(Trade.created_at, Trade.id) < cursor)
+    result = await db.execute(q.limit(limit))
+    trades = [dict(row) for row in result.mappings()]
+    return {"trades": trades, "next_before": trades[-1]["id"] if len(trades) == limit else None}
 
 
 @app.get("/balance")
-def get_balance():
-    return {"cash": broker.get_balance(), "portfolio_value": broker.get_portfolio_value(), "initial_capital": settings.INITIAL_CAPITAL}
+async def get_balance(broker: PaperBroker = Depends(get_broker)):
+    return {"cash": broker.get_balance(), "portfolio_value": broker.get_portfolio_value(), "initial_capital": _INIT_CAP}
 
 
 @app.post("/broker/reset")
-def reset_broker(db: Session = Depends(get_db)):
-    broker.reset()
-    risk_mgr.update_capital(settings.INITIAL_CAPITAL)
-    db.query(Position).delete()
-    db.commit()
+async def reset_broker(
+    db: AsyncSession = Depends(get_async_db),
+    broker: PaperBroker = Depends(get_broker),
+    risk_mgr: RiskManager = Depends(get_risk_manager),
+    lock: asyncio.Lock = Depends(get_broker_lock),
+):
+    async with lock:
+        broker.reset()
+        risk_mgr.update_capital(_INIT_CAP)
+        await db.execute(delete(Position))
+        await db.commit()
     return {"message": "Broker reset", "balance": broker.get_balance()}
 
 
 @app.post("/price/update")
-def update_price(body: PriceUpdate):
-    broker.update_price(body.symbol, body.price)
+async def update_price(body: PriceUpdate, broker: PaperBroker = Depends(get_broker), lock: asyncio.Lock = Depends(get_broker_lock)):
+    async with lock:
+        broker.update_price(body.symbol, body.price)
     return {"symbol": body.symbol, "price": body.price, "portfolio_value": broker.get_portfolio_value()}
 
 
+@app.post("/price/update/batch")
+async def update_prices(body: List[PriceUpdate], broker: PaperBroker = Depends(get_broker), lock: asyncio.Lock = Depends(get_broker_lock)):
+    # Last write wins per symbol
+    prices = {u.symbol: u.price for u in body}
+    async with lock:
+        updated = broker.update_prices_bulk(prices)
+    return {"received": len(body), "updated": updated, "portfolio_value": broker.get_portfolio_value()}
+
+
+# Seconds over which websocket ticks are coalesced into a single broker update
+_PRICE_WINDOW = 0.010
+
+
+@app.websocket("/ws/prices")
+async def price_stream(ws: WebSocket, broker: PaperBroker = Depends(get_broker), lock: asyncio.Lock = Depends(get_broker_lock)):
+    # Frames are JSON arrays of [symbol, price] pairs; ticks arriving within
+    # _PRICE_WINDOW of the first are coalesced into one broker update.
+    await ws.accept()
+    loop = asyncio.get_running_loop()
+    connected = True
+    try:
+        while connected:
+            pending: dict = {}
+            connected = _merge_ticks(pending, await ws.receive())
+            deadline = loop.time() + _PRICE_WINDOW
+            while connected and (left := deadline - loop.time()) > 0:
+                try:
+                    msg = await asyncio.wait_for(ws.receive(), left)
+                except asyncio.TimeoutError:
+                    break
+                connected = _merge_ticks(pending, msg)
+            if pending:
+                async with lock:
+                    broker.update_prices_bulk(pending)
+    except (ValueError, TypeError):
+        await ws.close(code=status.WS_1007_INVALID_FRAME_PAYLOAD_DATA)
+
+
+def main() -> None:
+    # Create tables once up front so workers don't race each other in create_all
+    init_db()
+    uvicorn.run(
+        "app.main:app",
+        host=settings.HOST,
+        port=settings.PORT,
+        workers=settings.WORKERS or os.cpu_count(),
+        # "auto" picks uvloop/httptools when installed (not on Windows) and falls back to asyncio/h11
+        loop="auto",
+        http="auto",
+        limit_concurrency=1000,
+        timeout_keep_alive=30,
+        reload=settings.DEBUG,
+    )
+
+
 if __name__ == "__main__":
-    uvicorn.run("app.main:app", host=settings.HOST, port=settings.PORT, reload=True)
+    main()
@@ -1,9 +1,8 @@
 # app/models/trade.py
 import enum
 import uuid
-from datetime import datetime, timezone
 
-from sqlalchemy import Column, DateTime, Float, Integer, String
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Uuid, func
 from app.database import Base
 
 
@@ -19,19 +18,11 @@ class OrderStatus(str, enum.Enum):
     REJECTED = "REJECTED"
 
 
-def _utcnow() -> datetime:
-    return datetime.now(timezone.utc)
-
-
-def _uuid() -> str:
-    return str(uuid.uuid4())
-
-
 class Trade(Base):
     __tablename__ = "trades"
 
-    id = Column(String, primary_key=True, default=_uuid)
-    symbol = Column(String, nullable=False, index=True)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
+    symbol = Column(String, nullable=False)
     side = Column(String, nullable=False)
     quantity = Column(Float, nullable=False)
     price = Column(Float, nullable=False)
@@ -41,11 +32,14 @@ class Trade(Base):
     pnl = Column(Float, nullable=False, default=0.0)
     status = Column(String, nullable=False, default=OrderStatus.FILLED.value)
     strategy = Column(String, nullable=True)
-    created_at = Column(DateTime, default=_utcnow)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    # Serves /trades?symbol=... filter and newest-first ordering from one index scan
+    __table_args__ = (Index("ix_trades_symbol_created_at", "symbol", created_at.desc()),)
 
     def to_dict(self) -> dict:
         return {
-            "id": self.id,
+            "id": str(self.id) if self.id else None,
             "symbol": self.symbol,
             "side": self.side,
             "quantity": self.quantity,
@@ -63,7 +57,7 @@ class Trade(Base):
 class Position(Base):
     __tablename__ = "positions"
 
-    id = Column(String, primary_key=True, default=_uuid)
+    id = Column(Uuid, primary_key=True, default=uuid.uuid4)
     symbol = Column(String, nullable=False, index=True, unique=True)
     side = Column(String, nullable=False)
     quantity = Column(Float, nullable=False)
@@ -71,11 +65,11 @@ class Position(Base):
     current_price = Column(Float, nullable=False)
     stop_loss = Column(Float, nullable=True)
     unrealized_pnl = Column(Float, nullable=False, default=0.0)
-    opened_at = Column(DateTime, default=_utcnow)
+    opened_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     def to_dict(self) -> dict:
         return {
-            "id": self.id,
+            "id": str(self.id) if self.id else None,
             "symbol": self.symbol,
             "side": self.side,
             "quantity": self.quantity,
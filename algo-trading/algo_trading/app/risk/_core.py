@@ -0,0 +1,55 @@
+# app/risk/_core.py
+from __future__ import annotations
+
+import numpy as np
+
+from app._jit import njit
+
+APPROVED = 0
+INVALID_PRICE = 1
+MAX_POSITIONS = 2
+MAX_EXPOSURE = 3
+ZERO_SIZE = 4
+
+_ASSESS_SIG = "Tuple((i8, f8, f8, f8, f8))(f8, b1, f8, i8, f8, f8, f8, f8, i8, f8)"
+_ASSESS_BATCH_SIG = "Tuple((i8[:], f8[:], f8[:], f8[:]))(f8[:], b1[:], f8[:], i8[:], f8, f8, f8, f8, i8, f8)"
+
+
+@njit(_ASSESS_SIG, cache=True)
+def assess_core(price, is_buy, current_exposure, open_count, capital, risk_per_trade, stop_loss_pct, max_position_pct, max_open_positions, max_total_exposure):
+    # -> (reason_code, position_size, stop_loss_price, risk_amount, exposure_ratio)
+    if price <= 0:
+        return INVALID_PRICE, 0.0, 0.0, 0.0, 0.0
+    if open_count >= max_open_positions:
+        return MAX_POSITIONS, 0.0, 0.0, 0.0, 0.0
+
+    exposure_ratio = current_exposure / capital if capital > 0 else 1.0
+    if exposure_ratio >= max_total_exposure:
+        return MAX_EXPOSURE, 0.0, 0.0, 0.0, exposure_ratio
+
+    risk_amount = capital * risk_per_trade
+    stop_distance = price * stop_loss_pct
+    size = risk_amount / stop_distance if stop_distance > 0 else 0.0
+    size = min(size, capital * max_position_pct / price)
+    remaining = max_total_exposure * capital - current_exposure
+    size = max(min(size, remaining / price), 0.0)
+    if size <= 0:
+        return ZERO_SIZE, 0.0, 0.0, 0.0, exposure_ratio
+
+    stop = price * (1 - stop_loss_pct) if is_buy else price * (1 + stop_loss_pct)
+    return APPROVED, size, stop, risk_amount, exposure_ratio
+
+
+@njit(_ASSESS_BATCH_SIG, cache=True)
+def assess_batch_core(prices, is_buy, exposures, open_counts, capital, risk_per_trade, stop_loss_pct, max_position_pct, max_open_positions, max_total_exposure):
+    n = prices.shape[0]
+    codes = np.empty(n, dtype=np.int64)
+    sizes = np.empty(n, dtype=np.float64)
+    stops = np.empty(n, dtype=np.float64)
+    risks = np.empty(n, dtype=np.float64)
+    for i in range(n):
+        codes[i], sizes[i], stops[i], risks[i], _ = assess_core(
+            prices[i], is_buy[i], exposures[i], open_counts[i],
+            capital, risk_per_trade, stop_loss_pct, max_position_pct, max_open_positions, max_total_exposure,
+        )
+    return codes, sizes, stops, risks
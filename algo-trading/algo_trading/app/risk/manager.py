@@ -2,7 +2,20 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from typing import Optional, Sequence, Union
+
+import numpy as np
+
 from app.config import settings
+from app.risk._core import APPROVED, INVALID_PRICE, MAX_EXPOSURE, MAX_POSITIONS, ZERO_SIZE, assess_batch_core, assess_core
+
+ASSESSMENT_DTYPE = np.dtype([
+    ("approved", np.bool_),
+    ("position_size", np.float64),
+    ("stop_loss_price", np.float64),
+    ("risk_amount", np.float64),
+    ("reason_code", np.int64),
+])
 
 
 @dataclass
@@ -34,6 +47,12 @@ class RiskManager:
     def update_capital(self, new_capital: float) -> None:
         self.capital = new_capital
 
+    def _limits(self) -> tuple:
+        return (
+            float(self.capital), float(self.risk_per_trade), float(self.stop_loss_pct),
+            float(self.max_position_pct), int(self.max_open_positions), float(self.max_total_exposure),
+        )
+
     def assess_trade(
         self,
         price: float,
@@ -41,50 +60,55 @@ class RiskManager:
         current_exposure: float = 0.0,
         open_position_count: int = 0,
     ) -> RiskAssessment:
-        if price <= 0:
-            return RiskAssessment(False, 0.0, 0.0, 0.0, "Invalid price")
-
-        if open_position_count >= self.max_open_positions:
-            return RiskAssessment(
-                False, 0.0, 0.0, 0.0,
-                f"Max open positions reached ({self.max_open_positions})",
-            )
-
-        exposure_ratio = current_exposure / self.capital if self.capital > 0 else 1.0
-        if exposure_ratio >= self.max_total_exposure:
-            return RiskAssessment(
-                False, 0.0, 0.0, 0.0,
-                f"Total exposure {exposure_ratio:.1%} exceeds limit {self.max_total_exposure:.1%}",
-            )
-
-        risk_amount = self.capital * self.risk_per_trade
-        stop_distance = price * self.stop_loss_pct
-        position_size = risk_amount / stop_distance if stop_distance > 0 else 0.0
-
-        max_position_value = self.capital * self.max_position_pct
-        max_qty = max_position_value / price if price > 0 else 0.0
-        position_size = min(position_size, max_qty)
-
-        remaining = (self.max_total_exposure * self.capital) - current_exposure
-        max_remaining_qty = remaining / price if price > 0 else 0.0
-        position_size = max(min(position_size, max_remaining_qty), 0.0)
-
-        if position_size <= 0:
-            return RiskAssessment(False, 0.0, 0.0, 0.0, "Computed position size is zero")
-
-        if side.upper() == "BUY":
-            stop_loss_price = price * (1 - self.stop_loss_pct)
-        else:
-            stop_loss_price = price * (1 + self.stop_loss_pct)
-
+        code, size, stop, risk_amount, exposure_ratio = assess_core(
+            float(price), side.upper() == "BUY", float(current_exposure), int(open_position_count), *self._limits()
+        )
+        if code != APPROVED:
+            return RiskAssessment(False, 0.0, 0.0, 0.0, self._reason(code, exposure_ratio))
         return RiskAssessment(
             approved=True,
-            position_size=round(position_size, 6),
-            stop_loss_price=round(stop_loss_price, 4),
+            position_size=round(size, 6),
+            stop_loss_price=round(stop, 4),
             risk_amount=round(risk_amount, 2),
             reason="Trade approved",
         )
 
+    def assess_batch(
+        self,
+        prices: Sequence[float],
+        sides: Union[Sequence[str], np.ndarray],
+        exposures: Sequence[float],
+        open_position_counts: Optional[Sequence[int]] = None,
+    ) -> np.ndarray:
+        prices = np.ascontiguousarray(prices, dtype=np.float64)
+        sides = np.asarray(sides)
+        # A boolean array is taken as BUY flags, e.g. SignalBatch.is_buy
+        is_buy = sides if sides.dtype == np.bool_ else np.char.upper(sides.astype(str)) == "BUY"
+        exposures = np.ascontiguousarray(exposures, dtype=np.float64)
+        if open_position_counts is None:
+            counts = np.zeros(len(prices), dtype=np.int64)
+        else:
+            counts = np.ascontiguousarray(open_position_counts, dtype=np.int64)
+        codes, sizes, stops, risks = assess_batch_core(prices, is_buy, exposures, counts, *self._limits())
+        out = np.empty(len(prices), dtype=ASSESSMENT_DTYPE)
+        out["approved"] = codes == APPROVED
+        out["position_size"] = np.round(sizes, 6)
+        out["stop_loss_price"] = np.round(stops, 4)
+        out["risk_amount"] = np.round(risks, 2)
+        out["reason_code"] = codes
+        return out
+
+    def _reason(self, code: int, exposure_ratio: float) -> str:
+        if code == INVALID_PRICE:
+            return "Invalid price"
+        if code == MAX_POSITIONS:
+            return f"Max open positions reached ({self.max_open_positions})"
+        if code == MAX_EXPOSURE:
+            return f"Total exposure {exposure_ratio:.1%} exceeds limit {self.max_total_exposure:.1%}"
+        if code == ZERO_SIZE:
+            return "Computed position size is zero"
+        return "Trade approved"
+
     def check_drawdown(self, peak_equity: float) -> dict:
         dd = (self.capital - peak_equity) / peak_equity if peak_equity > 0 else 0.0
         return {
@@ -1,19 +1,23 @@
 # app/services/trading_service.py
 from __future__ import annotations
 
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import Dict, Iterator, List, Optional
 
 import pandas as pd
 from sqlalchemy.orm import Session
 
-from app.broker.base import BaseBroker, PositionInfo
+from app.broker.base import BaseBroker, PositionInfo, Side
 from app.models.trade import Position, Trade
 from app.risk.manager import RiskManager
-from app.strategies.base import BaseStrategy, Signal
+from app.strategies.base import BaseStrategy, SignalBatch
 
 
-@dataclass
+@dataclass(slots=True)
 class TradingResult:
     executed: int = 0
     rejected: int = 0
@@ -27,58 +31,112 @@ class TradingService:
         broker: BaseBroker,
         risk_manager: RiskManager,
         db: Optional[Session] = None,
+        batch_size: int = 500,
+        record_details: bool = False,
     ) -> None:
         self.strategy = strategy
         self.broker = broker
         self.risk_manager = risk_manager
         self.db = db
         self.peak_equity = broker.get_portfolio_value()
+        # Per-signal dicts in TradingResult.details are opt-in; the counters are always kept
+        self.record_details = record_details
+        # DB writes are flushed immediately and committed every `batch_size` operations and at the end of each bar
+        self._batch_size = batch_size
+        self._pending = 0
+        # symbol -> Position row loaded or added during the current bar; released when the bar commits
+        self._pos_cache: Dict[str, Position] = {}
+        # Serialises broker, risk-manager and session access if process_bar is called from several threads
+        self._lock = threading.RLock()
+
+    def __enter__(self) -> "TradingService":
+        return self
+
+    def __exit__(self, exc_type, *exc) -> None:
+        if exc_type is None:
+            self.flush()
+        else:
+            self.rollback()
+
+    def rollback(self) -> None:
+        with self._lock:
+            if self.db is not None:
+                self.db.rollback()
+            self._pending = 0
+            self._pos_cache.clear()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self.db is not None and self._pending:
+                self.db.commit()
+                self._pending = 0
 
     def process_bar(self, df: pd.DataFrame, symbol: str) -> TradingResult:
-        signals = self.strategy.generate_signals(df, symbol)
-        result = TradingResult()
+        return self._execute(self.strategy.generate_signal_batch(df, symbol))
 
-        for sig in signals:
-            if sig.signal == Signal.HOLD:
-                continue
-
-            positions = self.broker.get_positions()
-            exposure = sum(p.current_price * p.quantity for p in positions)
-
-            if sig.signal == Signal.BUY:
-                assessment = self.risk_manager.assess_trade(sig.price, "BUY", exposure, len(positions))
-                if not assessment.approved:
-                    result.rejected += 1
-                    result.details.append({"signal": "BUY", "symbol": sig.symbol, "status": "REJECTED", "reason": assessment.reason})
-                    continue
-                order = self.broker.place_order(sig.symbol, "BUY", assessment.position_size, sig.price, assessment.stop_loss_price)
-                if order.status == "FILLED":
-                    result.executed += 1
-                    self._save_trade(order)
-                    self._save_position(order, assessment.stop_loss_price)
-                    self.risk_manager.update_capital(self.broker.get_balance())
-                else:
-                    result.rejected += 1
-                result.details.append({"signal": "BUY", "symbol": sig.symbol, "status": order.status, "qty": order.quantity, "price": order.price})
-
-            elif sig.signal == Signal.SELL:
-                order = self.broker.close_position(sig.symbol, sig.price)
-                if order.status == "FILLED":
-                    result.executed += 1
-                    pnl = self._calc_pnl(sig.symbol, order.price, order.quantity, positions)
-                    self._save_trade(order, pnl)
-                    self._del_position(sig.symbol)
-                    self.risk_manager.update_capital(self.broker.get_balance())
-                else:
-                    result.rejected += 1
-                result.details.append({"signal": "SELL", "symbol": sig.symbol, "status": order.status, "qty": order.quantity, "price": order.price})
-
-            val = self.broker.get_portfolio_value()
-            if val > self.peak_equity:
-                self.peak_equity = val
+    def _execute(self, batch: SignalBatch) -> TradingResult:
+        symbol = batch.symbol
+        result = TradingResult()
 
+        with self._lock:
+            # Positions only change on fills; poll the broker once and patch the local map after each fill
+            positions_by_sym = {p.symbol: p for p in self.broker.get_positions()}
+            # Kept in step with positions_by_sym: each fill adjusts it by that symbol's change only
+            exposure = sum(p.current_price * p.quantity for p in positions_by_sym.values())
+            with self._bar_session():
+                for is_buy, price in zip(batch.is_buy.tolist(), batch.prices.tolist()):
+                    if is_buy:
+                        assessment = self.risk_manager.assess_trade(price, "BUY", exposure, len(positions_by_sym))
+                        if not assessment.approved:
+                            result.rejected += 1
+                            if self.record_details:
+                                result.details.append({"signal": "BUY", "symbol": symbol, "status": "REJECTED", "reason": assessment.reason})
+                            continue
+                        order = self.broker.place_order(symbol, Side.BUY, assessment.position_size, price, assessment.stop_loss_price)
+                        if order.status == "FILLED":
+                            result.executed += 1
+                            self._save_trade(order)
+                            self._save_position(order, assessment.stop_loss_price)
+                            self.risk_manager.update_capital(self.broker.get_balance())
+                            exposure += self._refresh_position(positions_by_sym, symbol)
+                        else:
+                            result.rejected += 1
+                        if self.record_details:
+                            result.details.append({"signal": "BUY", "symbol": symbol, "status": order.status, "qty": order.quantity, "price": order.price})
+
+                    else:
+                        order = self.broker.close_position(symbol, price)
+                        if order.status == "FILLED":
+                            result.executed += 1
+                            pnl = self._calc_pnl(symbol, order.price, order.quantity, positions_by_sym)
+                            self._save_trade(order, pnl)
+                            self._del_position(symbol)
+                            self.risk_manager.update_capital(self.broker.get_balance())
+                            exposure += self._refresh_position(positions_by_sym, symbol)
+                        else:
+                            result.rejected += 1
+                        if self.record_details:
+                            result.details.append({"signal": "SELL", "symbol": symbol, "status": order.status, "qty": order.quantity, "price": order.price})
+
+                # Nothing from this bar is left uncommitted; batch_size only caps the commits within it
+                self.flush()
+                self._release_positions()
+
+            self.peak_equity = max(self.peak_equity, self.broker.get_portfolio_value())
         return result
 
+    def process_bars(self, df_by_symbol: Dict[str, pd.DataFrame], max_workers: Optional[int] = None) -> Dict[str, TradingResult]:
+        # Signals are generated concurrently (the jitted kernels release the GIL); orders are then
+        # executed one symbol at a time in sorted order, since every fill feeds the next risk check
+        symbols = sorted(df_by_symbol)
+        if len(symbols) <= 1:
+            batches = [self.strategy.generate_signal_batch(df_by_symbol[sym], sym) for sym in symbols]
+        else:
+            workers = min(max_workers or os.cpu_count() or 1, len(symbols))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                batches = list(pool.map(lambda sym: self.strategy.generate_signal_batch(df_by_symbol[sym], sym), symbols))
+        return {batch.symbol: self._execute(batch) for batch in batches}
+
     def get_performance(self) -> dict:
         pv = self.broker.get_portfolio_value()
         cash = self.broker.get_balance()
@@ -98,22 +156,32 @@ class TradingService:
             "strategy": self.strategy.name,
         }
 
-    def _calc_pnl(self, symbol: str, exit_price: float, qty: float, positions: List[PositionInfo]) -> float:
-        for p in positions:
-            if p.symbol == symbol:
-                return (exit_price - p.entry_price) * qty
-        return 0.0
+    def _refresh_position(self, positions_by_sym: Dict[str, PositionInfo], symbol: str) -> float:
+        # -> change in exposure from this symbol's position
+        prev = positions_by_sym.pop(symbol, None)
+        current = self.broker.get_position(symbol)
+        if current is not None:
+            positions_by_sym[symbol] = current
+        before = prev.current_price * prev.quantity if prev is not None else 0.0
+        after = current.current_price * current.quantity if current is not None else 0.0
+        return after - before
+
+    def _calc_pnl(self, symbol: str, exit_price: float, qty: float, positions_by_sym: Dict[str, PositionInfo]) -> float:
+        p = positions_by_sym.get(symbol)
+        return (exit_price - p.entry_price) * qty if p is not None else 0.0
 
     def _save_trade(self, order, pnl: float = 0.0) -> None:
         if self.db is None:
             return
         self.db.add(Trade(symbol=order.symbol, side=order.side, quantity=order.quantity, price=order.price, commission=order.commission, pnl=pnl, status=order.status, strategy=self.strategy.name))
-        self.db.commit()
+        self._written()
 
     def _save_position(self, order, stop_loss: float) -> None:
         if self.db is None:
             return
-        ex = self.db.query(Position).filter(Position.symbol == order.symbol).first()
+        ex = self._pos_cache.get(order.symbol)
+        if ex is None:
+            ex = self.db.query(Position).filter(Position.symbol == order.symbol).first()
         if ex:
             nq = ex.quantity + order.quantity
             ex.entry_price = (ex.entry_price * ex.quantity + order.price * order.quantity) / nq
@@ -121,13 +189,49 @@ class TradingService:
             ex.current_price = order.price
             ex.stop_loss = stop_loss
         else:
-            self.db.add(Position(symbol=order.symbol, side=order.side, quantity=order.quantity, entry_price=order.price, current_price=order.price, stop_loss=stop_loss))
-        self.db.commit()
+            ex = Position(symbol=order.symbol, side=order.side, quantity=order.quantity, entry_price=order.price, current_price=order.price, stop_loss=stop_loss)
+            self.db.add(ex)
+        self._pos_cache[order.symbol] = ex
+        self._written()
 
     def _del_position(self, symbol: str) -> None:
         if self.db is None:
             return
-        p = self.db.query(Position).filter(Position.symbol == symbol).first()
+        p = self._pos_cache.pop(symbol, None)
+        if p is None:
+            p = self.db.query(Position).filter(Position.symbol == symbol).first()
         if p:
             self.db.delete(p)
-            self.db.commit()
+            self._written()
+
+    def _release_positions(self) -> None:
+        # The bar's rows stayed loaded through its commits; expire them so the next bar reloads
+        # whatever another session changed or deleted in between (e.g. /broker/reset)
+        if self.db is not None:
+            for p in self._pos_cache.values():
+                self.db.expire(p)
+        self._pos_cache.clear()
+
+    @contextmanager
+    def _bar_session(self) -> Iterator[None]:
+        # Rows written here are only read back from memory; skip the post-commit reload.
+        # If anything in the bar raises, roll back so the next bar starts from a clean session.
+        if self.db is None:
+            yield
+            return
+        prev = self.db.expire_on_commit
+        self.db.expire_on_commit = False
+        try:
+            yield
+        except BaseException:
+            self.rollback()
+            raise
+        finally:
+            self.db.expire_on_commit = prev
+
+    def _written(self) -> None:
+        # Flush so later lookups in this session see the row; commit in batches
+        self.db.flush()
+        self._pending += 1
+        if self._pending >= self._batch_size:
+            self.flush()
@@ -0,0 +1,133 @@
+# app/strategies/_kernel.py
+from __future__ import annotations
+
+import numpy as np
+
+from app._jit import njit
+
+_RSI_SIG = "f8[:](f8[:], i8)"
+
+
+@njit(_RSI_SIG, cache=True, nogil=True)
+def wilder_rsi(close, period):
+    # Single pass of the Series.diff/clip/ewm(alpha=1/period, adjust=False, min_periods=period)
+    # pipeline: same alpha derivation and normalisation as pandas, so the output is bit-identical
+    n = close.shape[0]
+    rsi = np.full(n, np.nan)
+    if n < 2:
+        return rsi
+    alpha = 1.0 / (1.0 + (1.0 - 1.0 / period) / (1.0 / period))
+    keep = 1.0 - alpha
+    norm = keep + alpha
+    delta = close[1] - close[0]
+    avg_gain = max(delta, 0.0)
+    avg_loss = -min(delta, 0.0)
+    for i in range(1, n):
+        if i > 1:
+            delta = close[i] - close[i - 1]
+            gain = max(delta, 0.0)
+            loss = -min(delta, 0.0)
+            if avg_gain != gain:
+                avg_gain = (keep * avg_gain + alpha * gain) / norm
+            if avg_loss != loss:
+                avg_loss = (keep * avg_loss + alpha * loss) / norm
+        if i >= period and avg_loss != 0:
+            rsi[i] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    return rsi
+
+
+_ROLLING_MEAN_SIG = "f8[:](f8[:], i8)"
+_SMA_CROSSINGS_SIG = "Tuple((i8[:], b1[:]))(f8[:], f8[:], i8)"
+_MA_CROSSOVER_SIG = "Tuple((i8[:], b1[:]))(f8[:], i8, i8)"
+
+
+@njit(_ROLLING_MEAN_SIG, cache=True, nogil=True)
+def rolling_mean(close, window):
+    # Series.rolling(window).mean() as pandas computes it: Kahan-compensated running sums
+    # (one compensation for values entering the window, one for values leaving), a run of
+    # equal values returns that value, and an all-positive/all-negative window keeps its sign.
+    # Same operations in the same order, so the output is bit-identical and ties stay ties.
+    n = close.shape[0]
+    out = np.full(n, np.nan)
+    total = 0.0
+    comp_add = 0.0
+    comp_remove = 0.0
+    nobs = 0
+    neg_ct = 0
+    same_run = 0
+    prev = 0.0
+    for i in range(n):
+        s = max(i + 1 - window, 0)
+        if i == 0 or s >= i:
+            # Fresh window: only when it holds a single bar
+            total = comp_add = comp_remove = 0.0
+            nobs = neg_ct = same_run = 0
+            prev = close[s]
+            first = s
+        else:
+            first = i
+            if s > 0:
+                val = close[s - 1]
+                if val == val:
+                    nobs -= 1
+                    y = -val - comp_remove
+                    t = total + y
+                    comp_remove = t - total - y
+                    total = t
+                    if np.signbit(val):
+                        neg_ct -= 1
+        for j in range(first, i + 1):
+            val = close[j]
+            if val == val:
+                nobs += 1
+                y = val - comp_add
+                t = total + y
+                comp_add = t - total - y
+                total = t
+                if np.signbit(val):
+                    neg_ct += 1
+                if val == prev:
+                    same_run += 1
+                else:
+                    same_run = 1
+                prev = val
+        if nobs >= window and nobs > 0:
+            mean = total / nobs
+            if same_run >= nobs:
+                mean = prev
+            elif neg_ct == 0 and mean < 0:
+                mean = 0.0
+            elif neg_ct == nobs and mean > 0:
+                mean = 0.0
+            out[i] = mean
+    return out
+
+
+@njit(_SMA_CROSSINGS_SIG, cache=True, nogil=True)
+def sma_crossings(sma_short, sma_long, start):
+    # -> (bar indices where the short SMA crosses the long one, crossed-up flags).
+    # "Above" is strictly greater; NaN bars count as below.
+    n = sma_short.shape[0]
+    m = max(n - start - 1, 0)
+    bars = np.empty(m, dtype=np.int64)
+    up = np.empty(m, dtype=np.bool_)
+    if m == 0:
+        return bars, up
+    k = 0
+    above = sma_short[start] > sma_long[start]
+    for i in range(start + 1, n):
+        now = sma_short[i] > sma_long[i]
+        if now != above:
+            bars[k] = i
+            up[k] = now
+            k += 1
+            above = now
+    return bars[:k], up[:k]
+
+
+@njit(_MA_CROSSOVER_SIG, cache=True, nogil=True)
+def ma_crossover(close, short_window, long_window):
+    # -> (crossing bars, crossed-up flags)
+    sma_short = rolling_mean(close, short_window)
+    sma_long = rolling_mean(close, long_window)
+    return sma_crossings(sma_short, sma_long, max(short_window, long_window) - 1)
@@ -2,9 +2,13 @@
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
 from enum import Enum
-from typing import List
+from typing import List, Optional
 
+import numpy as np
 import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+OHLCV = ("open", "high", "low", "close", "volume")
 
 
 class Signal(str, Enum):
@@ -13,7 +17,7 @@ class Signal(str, Enum):
     HOLD = "HOLD"
 
 
-@dataclass
+@dataclass(slots=True)
 class TradeSignal:
     signal: Signal
     symbol: str
@@ -23,6 +27,32 @@ class TradeSignal:
     reason: str = ""
 
 
+@dataclass(slots=True)
+class SignalBatch:
+    # Column-wise BUY/SELL signals for one symbol, in bar order
+    symbol: str
+    is_buy: np.ndarray
+    prices: np.ndarray
+    timestamps: pd.DatetimeIndex
+    strengths: np.ndarray
+    # Positions of the signal bars in the frame they came from; None when built from TradeSignals
+    bars: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.prices)
+
+    @classmethod
+    def from_signals(cls, symbol: str, signals: List[TradeSignal]) -> "SignalBatch":
+        signals = [s for s in signals if s.signal != Signal.HOLD]
+        return cls(
+            symbol=symbol,
+            is_buy=np.array([s.signal == Signal.BUY for s in signals], dtype=np.bool_),
+            prices=np.array([s.price for s in signals], dtype=np.float64),
+            timestamps=pd.DatetimeIndex([s.timestamp for s in signals]),
+            strengths=np.array([s.strength for s in signals], dtype=np.float64),
+        )
+
+
 class BaseStrategy(ABC):
     def __init__(self, name: str) -> None:
         self.name = name
@@ -31,22 +61,26 @@ class BaseStrategy(ABC):
     def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
         pass
 
-    def validate_dataframe(self, df: pd.DataFrame) -> pd.DataFrame:
-        df = df.copy()
+    def generate_signal_batch(self, df: pd.DataFrame, symbol: str) -> SignalBatch:
+        # Strategies that find signals with array masks override this to skip the TradeSignal objects
+        return SignalBatch.from_signals(symbol, self.generate_signals(df, symbol))
+
+    def validate_dataframe(self, df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
+        # copy=False shares the column buffers with the caller; the steps below only ever
+        # replace columns/index on the new frame, so the caller's frame is still left untouched
+        df = df.copy(deep=copy)
         df.columns = [c.strip().lower() for c in df.columns]
-        required = {"open", "high", "low", "close", "volume"}
-        missing = required - set(df.columns)
+        missing = set(OHLCV) - set(df.columns)
         if missing:
             raise ValueError(f"DataFrame missing required columns: {missing}")
-        for col in ("open", "high", "low", "close", "volume"):
-            df[col] = pd.to_numeric(df[col], errors="coerce")
+        non_numeric = [c for c in OHLCV if not is_numeric_dtype(df[c])]
+        if non_numeric:
+            df[non_numeric] = df[non_numeric].apply(pd.to_numeric, errors="coerce")
         df.dropna(subset=["close"], inplace=True)
         if "date" in df.columns:
-            df["date"] = pd.to_datetime(df["date"])
-            df.set_index("date", inplace=True)
+            df.set_index(pd.to_datetime(df.pop("date")), inplace=True)
         elif "timestamp" in df.columns:
-            df["timestamp"] = pd.to_datetime(df["timestamp"])
-            df.set_index("timestamp", inplace=True)
+            df.set_index(pd.to_datetime(df.pop("timestamp")), inplace=True)
         if not isinstance(df.index, pd.DatetimeIndex):
             df.index = pd.to_datetime(df.index)
         df.sort_index(inplace=True)
@@ -1,11 +1,43 @@
 # app/strategies/moving_average.py
-from typing import List
+from typing import Callable, List, Tuple
 
 import numpy as np
 import pandas as pd
 
+try:
+    import bottleneck as bn
+except ImportError:  # pragma: no cover - bottleneck is optional at runtime
+    bn = None
+
+from app._jit import HAVE_NUMBA
 from app.config import settings
-from app.strategies.base import BaseStrategy, Signal, TradeSignal
+from app.strategies._kernel import ma_crossover, wilder_rsi
+from app.strategies.base import BaseStrategy, Signal, SignalBatch, TradeSignal
+
+
+# bottleneck keeps a plain running sum, a few ulps off pandas' compensated one; when the two
+# SMAs come this close anywhere, the crossings are taken from pandas' own rolling mean instead
+_BN_NEAR_TIE = 1e-9
+
+
+def _sma(values: np.ndarray, window: int) -> np.ndarray:
+    return pd.Series(values).rolling(window=window, min_periods=window).mean().to_numpy()
+
+
+def _smas(close: np.ndarray, short_window: int, long_window: int) -> Tuple[np.ndarray, np.ndarray]:
+    if bn is not None:
+        sma_short = bn.move_mean(close, short_window, min_count=short_window)
+        sma_long = bn.move_mean(close, long_window, min_count=long_window)
+        if not (np.abs(sma_short - sma_long) <= _BN_NEAR_TIE * np.abs(sma_long)).any():
+            return sma_short, sma_long
+    return _sma(close, short_window), _sma(close, long_window)
+
+
+def _sma_crossings(sma_short: np.ndarray, sma_long: np.ndarray, start: int) -> Tuple[np.ndarray, np.ndarray]:
+    short, long_ = sma_short[start:], sma_long[start:]
+    cross = np.diff(np.where(short > long_, 1, -1))
+    hits = np.flatnonzero(cross)
+    return hits + start + 1, cross[hits] > 0
 
 
 class MovingAverageCrossover(BaseStrategy):
@@ -17,56 +49,63 @@ class MovingAverageCrossover(BaseStrategy):
         self.short_window = short_window or settings.SHORT_WINDOW
         self.long_window = long_window or settings.LONG_WINDOW
         super().__init__(name=f"MA_Crossover({self.short_window},{self.long_window})")
+        self._reason_key: Tuple = ()
+        self._reasons_cache: Tuple[str, str] = ("", "")
 
-    def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
-        df = self.validate_dataframe(df)
+    def _reasons(self) -> Tuple[str, str]:
+        # -> (crossed-up, crossed-down) reasons, rebuilt only when the windows change
+        key = (self.short_window, self.long_window)
+        if key != self._reason_key:
+            self._reason_key = key
+            self._reasons_cache = (
+                f"SMA{self.short_window} crossed above SMA{self.long_window}",
+                f"SMA{self.short_window} crossed below SMA{self.long_window}",
+            )
+        return self._reasons_cache
+
+    def _signal_bars(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray]:
+        # -> (validated frame, signal bar indices, BUY flags)
+        df = self.validate_dataframe(df, copy=False)
         if len(df) < self.long_window:
-            return []
+            return df, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.bool_)
+        close = df["close"].to_numpy(dtype=np.float64)
+        if HAVE_NUMBA:
+            bars, up_flags = ma_crossover(close, self.short_window, self.long_window)
+        else:
+            bars, up_flags = _sma_crossings(
+                *_smas(close, self.short_window, self.long_window), max(self.short_window, self.long_window) - 1
+            )
+        return df, bars, up_flags
 
-        df = df.copy()
-        df["sma_short"] = (
-            df["close"]
-            .rolling(window=self.short_window, min_periods=self.short_window)
-            .mean()
-        )
-        df["sma_long"] = (
-            df["close"]
-            .rolling(window=self.long_window, min_periods=self.long_window)
-            .mean()
+    def generate_signal_batch(self, df: pd.DataFrame, symbol: str) -> SignalBatch:
+        df, bars, up_flags = self._signal_bars(df)
+        return SignalBatch(
+            symbol=symbol,
+            is_buy=up_flags,
+            prices=df["close"].to_numpy(dtype=np.float64)[bars],
+            timestamps=df.index[bars],
+            strengths=np.ones(len(bars)),
+            bars=bars,
         )
-        df.dropna(subset=["sma_short", "sma_long"], inplace=True)
-        if df.empty:
+
+    def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
+        df, bars, up_flags = self._signal_bars(df)
+        if not len(bars):
             return []
 
-        df["position"] = np.where(df["sma_short"] > df["sma_long"], 1.0, -1.0)
-        df["crossover"] = df["position"].diff()
-
-        signals: List[TradeSignal] = []
-        for ts, row in df.iterrows():
-            cross = row["crossover"]
-            if cross > 0:
-                signals.append(
-                    TradeSignal(
-                        signal=Signal.BUY,
-                        symbol=symbol,
-                        price=float(row["close"]),
-                        timestamp=pd.Timestamp(ts),
-                        strength=1.0,
-                        reason=f"SMA{self.short_window} crossed above SMA{self.long_window}",
-                    )
-                )
-            elif cross < 0:
-                signals.append(
-                    TradeSignal(
-                        signal=Signal.SELL,
-                        symbol=symbol,
-                        price=float(row["close"]),
-                        timestamp=pd.Timestamp(ts),
-                        strength=1.0,
-                        reason=f"SMA{self.short_window} crossed below SMA{self.long_window}",
-                    )
-                )
-        return signals
+        close = df["close"].to_numpy(dtype=np.float64)
+        up, down = self._reasons()
+        return [
+            TradeSignal(
+                signal=Signal.BUY if u else Signal.SELL,
+                symbol=symbol,
+                price=px,
+                timestamp=ts,
+                strength=1.0,
+                reason=up if u else down,
+            )
+            for u, px, ts in zip(up_flags.tolist(), close[bars].tolist(), df.index[bars])
+        ]
 
 
 class RSIMeanReversion(BaseStrategy):
@@ -80,55 +119,70 @@ class RSIMeanReversion(BaseStrategy):
         self.oversold = oversold
         self.overbought = overbought
         super().__init__(name=f"RSI_MeanRev({period},{oversold},{overbought})")
+        self._reason_key: Tuple = ()
+        self._reasons_cache: Tuple[Callable[[float], str], Callable[[float], str]] = (str, str)
 
-    @staticmethod
-    def _compute_rsi(series: pd.Series, period: int) -> pd.Series:
-        delta = series.diff()
-        gain = delta.clip(lower=0.0)
-        loss = -delta.clip(upper=0.0)
-        avg_gain = gain.ewm(alpha=1.0 / period, min_periods=period, adjust=False).mean()
-        avg_loss = loss.ewm(alpha=1.0 / period, min_periods=period, adjust=False).mean()
-        rs = avg_gain / avg_loss.replace(0, np.nan)
-        rsi = 100.0 - (100.0 / (1.0 + rs))
-        return rsi
+    def _reasons(self) -> Tuple[Callable[[float], str], Callable[[float], str]]:
+        # -> (BUY, SELL) reason formatters. Only the RSI value varies per signal; the rest of each
+        # reason is built once per set of parameters, and again if they are changed later.
+        key = (self.period, self.oversold, self.overbought)
+        if key != self._reason_key:
+            self._reason_key = key
+            self._reasons_cache = (
+                f"RSI({self.period}) dropped below {self.oversold}: {{:.1f}}".format,
+                f"RSI({self.period}) rose above {self.overbought}: {{:.1f}}".format,
+            )
+        return self._reasons_cache
 
-    def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
-        df = self.validate_dataframe(df)
+    def _signal_bars(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        # -> (validated frame, signal bar indices, BUY flags, RSI at the signal, strength)
+        df = self.validate_dataframe(df, copy=False)
         if len(df) < self.period + 1:
+            return df, np.empty(0, dtype=np.int64), np.empty(0, dtype=np.bool_), np.empty(0), np.empty(0)
+
+        rsi = wilder_rsi(df["close"].to_numpy(dtype=np.float64), int(self.period))
+        # Crossings compare consecutive defined RSI values, skipping undefined bars
+        valid = np.flatnonzero(~np.isnan(rsi))
+        r = rsi[valid]
+        prev, now = r[:-1], r[1:]
+        buy = (prev >= self.oversold) & (now < self.oversold)
+        sell = ~buy & (prev <= self.overbought) & (now > self.overbought)
+        hits = np.flatnonzero(buy | sell)
+        rsi_now = now[hits]
+        is_buy = buy[hits]
+        strength = np.where(
+            is_buy,
+            np.minimum((self.oversold - rsi_now) / self.oversold, 1.0),
+            np.minimum((rsi_now - self.overbought) / (100 - self.overbought), 1.0),
+        )
+        return df, valid[hits + 1], is_buy, rsi_now, strength
+
+    def generate_signal_batch(self, df: pd.DataFrame, symbol: str) -> SignalBatch:
+        df, bars, is_buy, _, strength = self._signal_bars(df)
+        return SignalBatch(
+            symbol=symbol,
+            is_buy=is_buy,
+            prices=df["close"].to_numpy(dtype=np.float64)[bars],
+            timestamps=df.index[bars],
+            strengths=strength,
+            bars=bars,
+        )
+
+    def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
+        df, bars, is_buy, rsi_now, strength = self._signal_bars(df)
+        if not len(bars):
             return []
 
-        df = df.copy()
-        df["rsi"] = self._compute_rsi(df["close"], self.period)
-        df.dropna(subset=["rsi"], inplace=True)
-        df["prev_rsi"] = df["rsi"].shift(1)
-        df.dropna(subset=["prev_rsi"], inplace=True)
-
-        signals: List[TradeSignal] = []
-        for ts, row in df.iterrows():
-            rsi_now = row["rsi"]
-            rsi_prev = row["prev_rsi"]
-            if rsi_prev >= self.oversold and rsi_now < self.oversold:
-                signals.append(
-                    TradeSignal(
-                        signal=Signal.BUY,
-                        symbol=symbol,
-                        price=float(row["close"]),
-                        timestamp=pd.Timestamp(ts),
-                        strength=min((self.oversold - rsi_now) / self.oversold, 1.0),
-                        reason=f"RSI({self.period}) dropped below {self.oversold}: {rsi_now:.1f}",
-                    )
-                )
-            elif rsi_prev <= self.overbought and rsi_now > self.overbought:
-                signals.append(
-                    TradeSignal(
-                        signal=Signal.SELL,
-                        symbol=symbol,
-                        price=float(row["close"]),
-                        timestamp=pd.Timestamp(ts),
-                        strength=min(
-                            (rsi_now - self.overbought) / (100 - self.overbought), 1.0
-                        ),
-                        reason=f"RSI({self.period}) rose above {self.overbought}: {rsi_now:.1f}",
-                    )
-                )
-        return signals
+        close = df["close"].to_numpy(dtype=np.float64)[bars]
+        buy_reason, sell_reason = self._reasons()
+        return [
+            TradeSignal(
+                signal=Signal.BUY if b else Signal.SELL,
+                symbol=symbol,
+                price=px,
+                timestamp=ts,
+                strength=st,
+                reason=buy_reason(v) if b else sell_reason(v),
+            )
+            for b, px, ts, st, v in zip(is_buy.tolist(), close.tolist(), df.index[bars], strength.tolist(), rsi_now.tolist())
+        ]
@@ -4,4 +4,5 @@ if not exist "venv" python -m venv venv
 call venv\Scripts\activate.bat
 pip install -q -r requirements.txt
 echo Starting on http://localhost:8000  Docs: http://localhost:8000/docs
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+if not defined DEBUG set DEBUG=true
+python -m app.main
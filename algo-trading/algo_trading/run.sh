@@ -5,4 +5,4 @@ cd "$(dirname "$0")"
 source venv/bin/activate
 pip install -q -r requirements.txt
 echo "Starting on http://localhost:8000  Docs: http://localhost:8000/docs"
-uvicorn app.main:app --reload --host 0.0.0.0 --port 8000
+DEBUG="${DEBUG:-true}" python -m app.main
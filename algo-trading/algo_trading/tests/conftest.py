@@ -0,0 +1,9 @@
+# tests/conftest.py
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# app.config reads the environment at import; keep the API tests off the working-directory database
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tempfile.mkdtemp(prefix='algo-tests-'), 'api.db')}"
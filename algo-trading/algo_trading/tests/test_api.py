@@ -0,0 +1,112 @@
+# tests/test_api.py
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+from app.database import SessionLocal
+from app.main import app
+from app.models.trade import Trade
+
+
+@pytest.fixture
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture
+def trades(client):
+    base = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    rows = [
+        Trade(id=uuid.uuid4(), symbol="AAA" if i % 3 else "BBB", side="BUY", quantity=1.0, price=100.0 + i,
+              status="FILLED", created_at=base + timedelta(minutes=i // 2))  # pairs share a timestamp
+        for i in range(25)
+    ]
+    with SessionLocal() as db:
+        db.execute(delete(Trade))
+        db.add_all(rows)
+        db.commit()
+        # Newest first, ties broken by id, the order /trades pages through
+        expected = [str(t.id) for t in sorted(rows, key=lambda t: (t.created_at, t.id.hex), reverse=True)]
+    yield expected
+    with SessionLocal() as db:
+        db.execute(delete(Trade))
+        db.commit()
+
+
+def _pages(client, **params):
+    ids, before = [], None
+    while True:
+        body = client.get("/trades", params={**params, **({"before": before} if before else {})}).json()
+        ids += [t["id"] for t in body["trades"]]
+        before = body["next_before"]
+        if before is None:
+            return ids
+
+
+def test_trades_keyset_pages_cover_every_trade_once(client, trades):
+    assert _pages(client, limit=4) == trades
+    assert _pages(client, limit=25) == trades
+
+
+def test_trades_pages_within_symbol(client, trades):
+    ids = _pages(client, limit=3, symbol="BBB")
+    assert len(ids) == 9
+    assert ids == [i for i in trades if i in set(ids)]
+
+
+def test_trades_unknown_cursor_is_404(client, trades):
+    resp = client.get("/trades", params={"before": str(uuid.uuid4())})
+    assert resp.status_code == 404
+
+
+def test_price_stream_rejects_malformed_frame(client):
+    with client.websocket_connect("/ws/prices") as ws:
+        ws.send_text("not json")
+        with pytest.raises(WebSocketDisconnect) as exc:
+            ws.receive_text()
+    assert exc.value.code == 1007
+
+
+def test_price_batch_updates_open_positions(client):
+    client.post("/broker/reset")
+    client.post("/trade", json={"symbol": "AAA", "side": "BUY", "quantity": 1, "price": 100.0})
+    body = client.post("/price/update/batch", json=[
+        {"symbol": "AAA", "price": 101.0}, {"symbol": "AAA", "price": 102.0}, {"symbol": "ZZZ", "price": 5.0},
+    ]).json()
+
+    assert (body["received"], body["updated"]) == (3, 1)
+    assert client.get("/positions").json()["positions"][0]["current_price"] == 102.0
+    client.post("/broker/reset")
+
+
+def test_backtest_runs_in_worker_process(client):
+    rows = ["date,open,high,low,close,volume"] + [
+        f"2024-01-{d:02d},1,1,1,{100 + (d % 7)},1" for d in range(1, 31)
+    ]
+    resp = client.post("/backtest", json={"short_window": 2, "long_window": 5, "csv_data": "\n".join(rows)})
+    assert resp.status_code == 200
+    assert resp.json()["total_trades"] > 0
+
+
+def test_singleton_providers_are_async():
+    # Plain-def dependencies are run in the threadpool on every request
+    import inspect
+
+    from app import main
+
+    for provider in (main.get_broker, main.get_risk_manager, main.get_broker_lock):
+        assert inspect.iscoroutinefunction(provider)
+
+
+def test_trade_and_positions_share_one_broker(client):
+    client.post("/broker/reset")
+    client.post("/trade", json={"symbol": "AAA", "side": "BUY", "quantity": 2, "price": 50.0})
+    client.post("/trade", json={"symbol": "BBB", "side": "BUY", "quantity": 1, "price": 20.0})
+    assert [p["symbol"] for p in client.get("/positions").json()["positions"]] == ["AAA", "BBB"]
+    assert client.get("/performance").json()["open_positions"] == 2
+    client.post("/broker/reset")
@@ -0,0 +1,210 @@
+# tests/test_backtest_engine.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.backtesting.engine import BacktestEngine, _align_signals, _round
+from app.backtesting._kernel import BUY, HOLD, SELL
+from app.strategies.base import Signal, SignalBatch
+from app.strategies.moving_average import MovingAverageCrossover, RSIMeanReversion
+
+
+def _bars(n: int = 300, seed: int = 7) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    t = np.arange(n)
+    close = 100 + 10 * np.sin(t / 9) + rng.normal(0, 0.5, n).cumsum()
+    return pd.DataFrame({
+        "date": pd.date_range("2023-01-02", periods=n, freq="D"),
+        "open": close, "high": close + 1, "low": close - 1, "close": close,
+        "volume": np.full(n, 1000.0),
+    })
+
+
+def test_csv_with_repeated_timestamp_runs():
+    df = _bars()
+    df = pd.concat([df.iloc[:120], df.iloc[[119]], df.iloc[120:]], ignore_index=True)
+    csv_text = df.assign(date=df["date"].dt.strftime("%Y-%m-%d")).to_csv(index=False)
+
+    result = BacktestEngine(MovingAverageCrossover(5, 20)).run_from_csv(csv_text, "DUP")
+
+    assert result.total_trades > 0
+    assert len(result.equity_curve) == len(df)
+
+
+def _repeat_rows(df: pd.DataFrame, *rows: int) -> pd.DataFrame:
+    # Repeat each given row in place, so its timestamp appears twice in a row
+    order = sorted(list(range(len(df))) + list(rows))
+    return df.iloc[order].reset_index(drop=True)
+
+
+@pytest.mark.parametrize("bars", [None, np.array([1, 3])])
+def test_align_signals_with_repeated_index(bars):
+    # With or without bar positions, a signal marks every bar stamped with its time
+    index = pd.DatetimeIndex(["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03"])
+    batch = SignalBatch(
+        symbol="X", is_buy=np.array([True, False]), prices=np.array([1.0, 2.0]),
+        timestamps=index[[1, 3]], strengths=np.ones(2), bars=bars,
+    )
+    assert _align_signals(batch, index).tolist() == [HOLD, BUY, BUY, SELL]
+
+
+@pytest.mark.parametrize("bars", [None, np.array([1, 2])])
+def test_align_signals_last_signal_at_a_time_wins(bars):
+    index = pd.DatetimeIndex(["2024-01-01", "2024-01-02", "2024-01-02", "2024-01-03"])
+    batch = SignalBatch(
+        symbol="X", is_buy=np.array([True, False]), prices=np.array([1.0, 2.0]),
+        timestamps=index[[1, 2]], strengths=np.ones(2), bars=bars,
+    )
+    assert _align_signals(batch, index).tolist() == [HOLD, SELL, SELL, HOLD]
+
+
+def test_signal_cache_follows_strategy_parameters():
+    df = _bars(500)
+    strategy = MovingAverageCrossover(5, 20)
+    engine = BacktestEngine(strategy)
+    first = engine.run(df, "PARAM").trade_columns.entry_time
+
+    strategy.short_window, strategy.long_window = 20, 60
+    changed = engine.run(df, "PARAM").trade_columns.entry_time
+
+    assert changed == BacktestEngine(MovingAverageCrossover(20, 60)).run(df, "PARAM").trade_columns.entry_time
+    assert changed != first
+
+
+def test_signal_cache_reuses_identical_runs():
+    df = _bars()
+    engine = BacktestEngine(MovingAverageCrossover(5, 20))
+    assert engine.run(df, "HIT").to_dict() == engine.run(df, "HIT").to_dict()
+
+
+def _reference_run(engine: BacktestEngine, df: pd.DataFrame, symbol: str) -> dict:
+    # The original bar-by-bar loop, kept as the oracle for the array/kernel implementation
+    df = engine.strategy.validate_dataframe(df)
+    signal_map = {s.timestamp.isoformat(): s.signal for s in engine.strategy.generate_signals(df, symbol)}
+    capital, qty, entry, entry_time = engine.initial_capital, 0.0, 0.0, ""
+    trades, curve = [], []
+
+    def close_out(price, ts_str):
+        nonlocal capital, qty, entry
+        exit_price = price * (1 - engine.slippage_pct)
+        commission = exit_price * qty * engine.commission_pct
+        pnl = (exit_price - entry) * qty - commission
+        trades.append({
+            "symbol": symbol, "side": "BUY", "entry_price": round(entry, 4), "exit_price": round(exit_price, 4),
+            "quantity": round(qty, 6), "entry_time": entry_time, "exit_time": ts_str,
+            "pnl": round(pnl, 2), "commission": round(commission, 2),
+            "return_pct": round((exit_price - entry) / entry if entry else 0, 6),
+        })
+        capital += pnl
+        qty, entry = 0.0, 0.0
+
+    for ts, close in zip(df.index, df["close"].tolist()):
+        ts_str = pd.Timestamp(ts).isoformat()
+        sig = signal_map.get(ts_str, Signal.HOLD)
+        if qty > 0 and close <= entry * (1 - engine.stop_loss_pct):
+            close_out(close, ts_str)
+        if sig == Signal.BUY and qty == 0:
+            buy_price = close * (1 + engine.slippage_pct)
+            stop_dist = buy_price * engine.stop_loss_pct
+            q = min(capital * engine.risk_per_trade / stop_dist if stop_dist > 0 else 0, capital * 0.95 / buy_price)
+            if q > 0:
+                capital -= buy_price * q * engine.commission_pct
+                qty, entry, entry_time = q, buy_price, ts_str
+        elif sig == Signal.SELL and qty > 0:
+            close_out(close, ts_str)
+        curve.append({"date": ts_str, "equity": round(capital + (qty * close if qty > 0 else 0), 2)})
+    if qty > 0:
+        close_out(float(df["close"].iloc[-1]), pd.Timestamp(df.index[-1]).isoformat())
+
+    wins = [t["pnl"] for t in trades if t["pnl"] > 0]
+    losses = [abs(t["pnl"]) for t in trades if t["pnl"] <= 0]
+    return {
+        "final_equity": round(capital, 2),
+        "winning_trades": len(wins),
+        "losing_trades": len(losses),
+        "avg_win": round(float(np.mean(wins)), 2) if wins else 0.0,
+        "avg_loss": round(float(np.mean(losses)), 2) if losses else 0.0,
+        "trades": trades,
+        "equity_curve": curve,
+    }
+
+
+@pytest.mark.parametrize("repeated", [(), (57,), (20, 150, 151, 333)])
+@pytest.mark.parametrize("seed", range(8))
+@pytest.mark.parametrize("make_strategy", [lambda: MovingAverageCrossover(5, 20), lambda: RSIMeanReversion(14, 35, 65)])
+def test_matches_reference_loop(seed, make_strategy, repeated):
+    df = _repeat_rows(_bars(400, seed), *repeated)
+    engine = BacktestEngine(make_strategy(), initial_capital=50_000.0, stop_loss_pct=0.02)
+    got = engine.run(df, "REF").to_dict()
+    want = _reference_run(engine, df, "REF")
+    assert {k: got[k] for k in want} == want
+
+
+@pytest.mark.parametrize("row", range(1, 39))
+def test_repeated_timestamp_matches_reference_loop(row):
+    rng = np.random.default_rng(70)
+    close = 100 + rng.normal(0, 1, 40).cumsum()
+    df = pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=40, freq="D"),
+        "open": close, "high": close, "low": close, "close": close, "volume": 1.0,
+    })
+    df = _repeat_rows(df, row)
+    engine = BacktestEngine(MovingAverageCrossover(3, 7))
+    got = engine.run(df, "DUP").to_dict()
+    want = _reference_run(engine, df, "DUP")
+    assert {k: got[k] for k in want} == want
+
+
+def test_round_matches_builtin_round():
+    rng = np.random.default_rng(3)
+    values = np.concatenate([
+        rng.uniform(-1e5, 1e5, 20_000),
+        np.arange(-2000, 2000) / 1000 + 0.005,  # values next to a half at 2 decimals
+    ])
+    for ndigits in (2, 4, 6):
+        assert _round(values, ndigits).tolist() == [round(v, ndigits) for v in values.tolist()]
+
+
+def _offset_csv() -> str:
+    df = _bars(120)
+    df["date"] = df["date"].dt.strftime("%Y-%m-%d 09:30:00-05:00")
+    return df.to_csv(index=False)
+
+
+def test_csv_keeps_source_utc_offset():
+    result = BacktestEngine(MovingAverageCrossover(5, 20)).run_from_csv(_offset_csv(), "TZ")
+
+    assert result.start_date == "2023-01-02 09:30:00-05:00"
+    assert result.equity_curve[0]["date"] == "2023-01-02T09:30:00-05:00"
+    assert result.trades and all(t.entry_time.endswith("T09:30:00-05:00") for t in result.trades)
+
+
+def test_csv_parsers_agree(monkeypatch):
+    from app.backtesting import engine as engine_mod
+
+    csv_text = _offset_csv()
+    with_arrow = BacktestEngine(MovingAverageCrossover(5, 20)).run_from_csv(csv_text, "TZ").to_dict()
+    monkeypatch.setattr(engine_mod, "pa_csv", None)
+    with_pandas = BacktestEngine(MovingAverageCrossover(5, 20)).run_from_csv(csv_text, "TZ").to_dict()
+    assert with_arrow == with_pandas
+
+
+def test_run_batch_matches_serial_runs():
+    items = [(_bars(200, seed), f"S{seed}") for seed in range(3)]
+    engine = BacktestEngine(MovingAverageCrossover(5, 20))
+    got = [r.to_dict() for r in engine.run_batch(items, max_workers=2)]
+    assert got == [engine.run(df, sym).to_dict() for df, sym in items]
+
+
+@pytest.mark.parametrize("jitted", [True, False])
+def test_to_dict_is_plain_json(monkeypatch, jitted):
+    import orjson
+
+    from app.backtesting import engine as engine_mod
+
+    if not jitted:
+        monkeypatch.setattr(engine_mod, "simulate", getattr(engine_mod.simulate, "py_func", engine_mod.simulate))
+    out = BacktestEngine(MovingAverageCrossover(5, 20)).run(_bars(), "JSON").to_dict()
+    # Plain orjson.dumps rejects NumPy scalars
+    assert orjson.loads(orjson.dumps(out)) == out
+    assert all(type(v) in (str, int, float, list) for v in out.values())
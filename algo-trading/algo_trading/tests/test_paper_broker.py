@@ -0,0 +1,61 @@
+# tests/test_paper_broker.py
+import pytest
+
+from app.broker.base import Side
+from app.broker.paper_broker import PaperBroker
+
+
+def _broker(*symbols: str) -> PaperBroker:
+    broker = PaperBroker(initial_capital=1_000_000.0, commission_pct=0.0, slippage_pct=0.0)
+    for n, sym in enumerate(symbols, start=1):
+        broker.place_order(sym, Side.BUY, 10.0 * n, 100.0 + n, stop_loss=90.0 + n)
+    return broker
+
+
+def test_positions_keep_open_order_after_close():
+    broker = _broker("AAA", "BBB", "CCC", "DDD")
+    broker.close_position("BBB", 110.0)
+
+    assert [p.symbol for p in broker.get_positions()] == ["AAA", "CCC", "DDD"]
+    assert [p["symbol"] for p in broker.get_positions_dict()] == ["AAA", "CCC", "DDD"]
+
+
+@pytest.mark.parametrize("closed", ["AAA", "BBB", "CCC"])
+def test_rows_stay_with_their_symbol_after_close(closed):
+    broker = _broker("AAA", "BBB", "CCC")
+    before = {p.symbol: p for p in broker.get_positions()}
+    broker.close_position(closed, 120.0)
+
+    after = {p.symbol: p for p in broker.get_positions()}
+    assert set(after) == set(before) - {closed}
+    for sym, pos in after.items():
+        assert pos == before[sym]
+        assert broker.get_position(sym) == pos
+    assert broker.get_position(closed) is None
+
+
+def test_partial_sell_keeps_position():
+    broker = _broker("AAA", "BBB")
+    broker.place_order("AAA", Side.SELL, 4.0, 105.0)
+    assert broker.get_position("AAA").quantity == pytest.approx(6.0)
+    assert [p.symbol for p in broker.get_positions()] == ["AAA", "BBB"]
+
+
+def test_exposure_tracks_mark_to_market_across_closes():
+    broker = _broker(*[f"S{i}" for i in range(20)])  # past the initial column capacity
+    broker.update_prices_bulk({"S3": 150.0, "S7": 80.0})
+    broker.close_position("S3", 150.0)
+    broker.update_price("S19", 200.0)
+    broker.close_position("S0", 100.0)
+
+    positions = broker.get_positions()
+    assert [p.symbol for p in positions] == [f"S{i}" for i in range(20) if i not in (0, 3)]
+    assert broker.get_exposure() == pytest.approx(sum(p.current_price * p.quantity for p in positions))
+    assert broker.get_position_count() == len(positions)
+
+
+def test_reopen_after_close_goes_last():
+    broker = _broker("AAA", "BBB")
+    broker.close_position("AAA", 100.0)
+    broker.place_order("AAA", Side.BUY, 1.0, 100.0)
+    assert [p.symbol for p in broker.get_positions()] == ["BBB", "AAA"]
@@ -0,0 +1,100 @@
+# tests/test_strategies.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.strategies import moving_average
+from app.strategies._kernel import rolling_mean
+from app.strategies.moving_average import MovingAverageCrossover, RSIMeanReversion
+
+
+def _tick_prices(rng: np.random.Generator, n: int) -> np.ndarray:
+    # Prices on a one-cent grid drift through the same few values, the case where SMAs tie
+    return np.round(100 + rng.choice([-0.01, 0.0, 0.01], n).cumsum(), 2)
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_rolling_mean_matches_pandas_on_tick_prices(seed):
+    rng = np.random.default_rng(seed)
+    close = _tick_prices(rng, 2_000)
+    for window in (1, 2, 3, 5, 10, 20, 50, 200):
+        want = pd.Series(close).rolling(window=window, min_periods=window).mean().to_numpy()
+        np.testing.assert_array_equal(rolling_mean(close, window), want)
+
+
+def test_rolling_mean_matches_pandas_with_gaps_and_signs():
+    rng = np.random.default_rng(1)
+    values = rng.normal(0, 1, 500)
+    values[[3, 4, 100, 250]] = np.nan
+    values[300:320] = 2.5
+    for window in (1, 4, 15):
+        want = pd.Series(values).rolling(window=window, min_periods=window).mean().to_numpy()
+        np.testing.assert_array_equal(rolling_mean(values, window), want)
+
+
+def _reference_crossings(close: np.ndarray, short_window: int, long_window: int):
+    # The original pandas pipeline: strict short > long, diff of the +1/-1 position
+    df = pd.DataFrame({"close": close})
+    df["s"] = df["close"].rolling(short_window, min_periods=short_window).mean()
+    df["l"] = df["close"].rolling(long_window, min_periods=long_window).mean()
+    df = df.dropna()
+    cross = pd.Series(np.where(df["s"] > df["l"], 1.0, -1.0), index=df.index).diff()
+    hits = cross[cross != 0].dropna()
+    return hits.index.to_numpy(), (hits > 0).to_numpy()
+
+
+@pytest.mark.parametrize("path", ["numba", "bottleneck", "pandas"])
+def test_ma_crossings_match_original_pipeline(monkeypatch, path):
+    if path == "numba":
+        if not moving_average.HAVE_NUMBA:
+            pytest.skip("numba not installed")
+    else:
+        monkeypatch.setattr(moving_average, "HAVE_NUMBA", False)
+        if path == "bottleneck":
+            bn = pytest.importorskip("bottleneck")
+            monkeypatch.setattr(moving_average, "bn", bn)
+        else:
+            monkeypatch.setattr(moving_average, "bn", None)
+
+    rng = np.random.default_rng(11)
+    for case in range(150):
+        close = _tick_prices(rng, 400)
+        short_window, long_window = int(rng.integers(2, 10)), int(rng.integers(10, 40))
+        strategy = MovingAverageCrossover(short_window, long_window)
+        df = pd.DataFrame({
+            "date": pd.date_range("2024-01-01", periods=len(close), freq="min"),
+            "open": close, "high": close, "low": close, "close": close, "volume": 1.0,
+        })
+        batch = strategy.generate_signal_batch(df, "TICK")
+        bars, up = _reference_crossings(close, short_window, long_window)
+        np.testing.assert_array_equal(batch.bars, bars, err_msg=f"case {case}")
+        np.testing.assert_array_equal(batch.is_buy, up, err_msg=f"case {case}")
+
+
+def _frame(close: np.ndarray) -> pd.DataFrame:
+    return pd.DataFrame({
+        "date": pd.date_range("2024-01-01", periods=len(close), freq="D"),
+        "open": close, "high": close, "low": close, "close": close, "volume": 1.0,
+    })
+
+
+def test_rsi_reasons_follow_changed_parameters():
+    close = 100 + 5 * np.sin(np.arange(300) / 6) + np.random.default_rng(4).normal(0, 0.3, 300)
+    strategy = RSIMeanReversion(14, 30, 70)
+    strategy.generate_signals(_frame(close), "RSI")
+
+    strategy.period, strategy.oversold, strategy.overbought = 7, 40.0, 60.0
+    got = [s.reason for s in strategy.generate_signals(_frame(close), "RSI")]
+    want = [s.reason for s in RSIMeanReversion(7, 40.0, 60.0).generate_signals(_frame(close), "RSI")]
+    assert got and got == want
+    assert all(r.startswith(("RSI(7) dropped below 40.0: ", "RSI(7) rose above 60.0: ")) for r in got)
+
+
+def test_ma_reasons_follow_changed_windows():
+    close = 100 + 5 * np.sin(np.arange(300) / 9)
+    strategy = MovingAverageCrossover(5, 20)
+    strategy.generate_signals(_frame(close), "MA")
+
+    strategy.short_window, strategy.long_window = 3, 12
+    reasons = {s.reason for s in strategy.generate_signals(_frame(close), "MA")}
+    assert reasons == {"SMA3 crossed above SMA12", "SMA3 crossed below SMA12"}
@@ -0,0 +1,135 @@
+# tests/test_trading_service.py
+from typing import List
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_engine, delete, select
+from sqlalchemy.orm import sessionmaker
+
+from app.broker.paper_broker import PaperBroker
+from app.database import Base
+from app.models.trade import Position, Trade
+from app.risk.manager import RiskManager
+from app.services.trading_service import TradingService
+from app.strategies.base import BaseStrategy, SignalBatch, TradeSignal
+
+
+class ScriptedStrategy(BaseStrategy):
+    # Emits the BUY/SELL flags in `script` for whichever bar is passed in
+    def __init__(self) -> None:
+        super().__init__(name="Scripted")
+        self.script: List[bool] = []
+
+    def generate_signals(self, df: pd.DataFrame, symbol: str) -> List[TradeSignal]:
+        return []
+
+    def generate_signal_batch(self, df: pd.DataFrame, symbol: str) -> SignalBatch:
+        n = len(self.script)
+        return SignalBatch(
+            symbol=symbol, is_buy=np.array(self.script, dtype=np.bool_), prices=np.full(n, 100.0),
+            timestamps=pd.DatetimeIndex([pd.Timestamp("2024-01-01")] * n), strengths=np.ones(n),
+        )
+
+
+@pytest.fixture
+def make_session(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'trading.db'}")
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine, autoflush=False)
+    engine.dispose()
+
+
+def _service(db, batch_size: int = 500) -> TradingService:
+    broker = PaperBroker(initial_capital=100_000.0)
+    return TradingService(ScriptedStrategy(), broker, RiskManager(capital=100_000.0), db=db, batch_size=batch_size)
+
+
+def test_buy_after_positions_deleted_elsewhere(make_session):
+    db = make_session()
+    svc = _service(db)
+    svc.strategy.script = [True]
+    assert svc.process_bar(pd.DataFrame(), "AAA").executed == 1
+
+    # What /broker/reset does from its own session
+    with make_session() as other:
+        other.execute(delete(Position))
+        other.commit()
+
+    assert svc.process_bar(pd.DataFrame(), "AAA").executed == 1
+    with make_session() as check:
+        rows = check.scalars(select(Position)).all()
+    assert [p.symbol for p in rows] == ["AAA"]
+    db.close()
+
+
+def test_second_buy_reads_quantity_changed_elsewhere(make_session):
+    db = make_session()
+    svc = _service(db)
+    svc.strategy.script = [True]
+    svc.process_bar(pd.DataFrame(), "AAA")
+    first_qty = svc.broker.get_position("AAA").quantity
+
+    with make_session() as other:
+        other.scalars(select(Position)).one().quantity = 1.0
+        other.commit()
+
+    svc.process_bar(pd.DataFrame(), "AAA")
+    with make_session() as check:
+        qty = check.scalars(select(Position)).one().quantity
+    assert qty == pytest.approx(1.0 + (svc.broker.get_position("AAA").quantity - first_qty))
+    db.close()
+
+
+def test_bar_is_committed_in_batches(make_session):
+    db = make_session()
+    svc = _service(db, batch_size=2)
+    svc.strategy.script = [True, False, True]
+    result = svc.process_bar(pd.DataFrame(), "AAA")
+
+    assert (result.executed, result.rejected) == (3, 0)
+    assert svc._pending == 0
+    with make_session() as check:
+        assert check.query(Trade).count() == 3
+        assert [p.symbol for p in check.scalars(select(Position))] == ["AAA"]
+    db.close()
+
+
+def test_rollback_discards_uncommitted_writes(make_session):
+    db = make_session()
+    svc = _service(db)
+    with pytest.raises(RuntimeError):
+        with svc:
+            svc._save_trade(svc.broker.place_order("BBB", "BUY", 1.0, 50.0))
+            raise RuntimeError("boom")
+    with make_session() as check:
+        assert check.query(Trade).count() == 0
+    db.close()
+
+
+def test_failed_write_rolls_back_the_bar(make_session, monkeypatch):
+    db = make_session()
+    svc = _service(db)
+    svc.strategy.script = [True]
+
+    real_flush = db.flush
+    calls = {"n": 0}
+
+    def flaky_flush(*args, **kwargs):
+        calls["n"] += 1
+        if calls["n"] == 2:  # the Position write after the first Trade
+            raise RuntimeError("disk full")
+        return real_flush(*args, **kwargs)
+
+    monkeypatch.setattr(db, "flush", flaky_flush)
+    with pytest.raises(RuntimeError):
+        svc.process_bar(pd.DataFrame(), "AAA")
+    assert svc._pending == 0 and not svc._pos_cache
+
+    # A plain process_bar caller carries on with the next bar
+    svc.strategy.script = [True]
+    assert svc.process_bar(pd.DataFrame(), "BBB").executed == 1
+    with make_session() as check:
+        assert [t.symbol for t in check.scalars(select(Trade))] == ["BBB"]
+        assert [p.symbol for p in check.scalars(select(Position))] == ["BBB"]
+    db.close()